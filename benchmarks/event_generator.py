@@ -0,0 +1,128 @@
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+import itertools
+import random
+import sys
+from typing import Iterator, List
+from harvest.actions import open_event_writer
+from harvest.events import (
+    Allocation,
+    Asset,
+    Event,
+    ReportFrequency,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+    SetTargetAllocation,
+)
+from harvest.report import series_dates
+
+START_DATE = date(2012, 1, 1)
+# share of balances re-entered on the same date, as a correction would be
+CORRECTION_RATE = 0.01
+
+ALLOCATIONS = [
+    Allocation(*(Decimal(pct) for pct in pcts))
+    for pcts in (
+        (100, 0, 0, 0, 0, 0),
+        (0, 100, 0, 0, 0, 0),
+        (0, 0, 100, 0, 0, 0),
+        (0, 0, 0, 100, 0, 0),
+        (0, 0, 0, 0, 100, 0),
+        (60, 10, 10, 15, 0, 5),
+    )
+]
+CASH_ALLOCATION = Allocation(*(Decimal(pct) for pct in (0, 0, 0, 0, 0, 100)))
+
+
+def holdings_per_account(assets: int) -> int:
+    return max(1, assets // 2)
+
+
+def events_per_period(accounts: int, assets: int) -> int:
+    return assets + accounts * holdings_per_account(assets)
+
+
+def to_amount(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+def generate_events(
+    accounts: int,
+    assets: int,
+    years: int,
+    frequency: ReportFrequency = "daily",
+    seed: int = 1,
+) -> Iterator[Event]:
+    # every account holds half of the assets, each period has a price per asset and a
+    # balance per holding following a random walk, with a few corrections mixed in
+    rng = random.Random(seed)
+    symbols = [Asset.cash("FDRXX")] + [
+        Asset.for_symbol(f"SYM{i}") for i in range(assets - 1)
+    ]
+    holdings = [
+        (f"account{i}", asset)
+        for i in range(accounts)
+        for asset in rng.sample(symbols, holdings_per_account(assets))
+    ]
+    prices = {asset: rng.uniform(10, 500) for asset in symbols}
+    balances = {holding: rng.uniform(1, 1000) for holding in holdings}
+    end = START_DATE.replace(year=START_DATE.year + years) - timedelta(days=1)
+    created_at = datetime.combine(START_DATE, time(16), timezone.utc)
+
+    yield SetTargetAllocation(START_DATE, ALLOCATIONS[-1], created_at)
+    for asset in symbols:
+        allocation = (
+            CASH_ALLOCATION if asset.type == "cash" else rng.choice(ALLOCATIONS)
+        )
+        yield SetAllocation(asset, START_DATE, allocation, created_at)
+
+    for dte in series_dates(START_DATE, end, frequency):
+        created_at = datetime.combine(dte, time(16), timezone.utc)
+        for asset in symbols:
+            if asset.type != "cash":
+                prices[asset] *= rng.gauss(1.0003, 0.01)
+            yield SetPrice(asset, dte, to_amount(prices[asset]), created_at)
+
+        for account, asset in holdings:
+            balances[account, asset] *= rng.gauss(1.0, 0.005)
+            amount = to_amount(balances[account, asset])
+            if rng.random() < CORRECTION_RATE:
+                yield SetBalance(account, asset, dte, amount + 1, created_at)
+            yield SetBalance(account, asset, dte, amount, created_at)
+
+
+def take_events(
+    count: int, accounts: int, assets: int, seed: int = 1
+) -> Iterator[Event]:
+    # the first count events of a daily log long enough to contain them
+    years = -(-count // (events_per_period(accounts, assets) * 365)) + 1
+    return itertools.islice(
+        generate_events(accounts, assets, years, "daily", seed), count
+    )
+
+
+def write_log(file_name: str, events: Iterator[Event]) -> int:
+    count = 0
+    with open_event_writer(file_name, flush_every=10000) as writer:
+        for evt in events:
+            writer.write(evt)
+            count += 1
+
+    return count
+
+
+def main(args: List[str]) -> None:
+    file_name, accounts, assets, years = args[:4]
+    frequency = args[4] if len(args) > 4 else "daily"
+    events = generate_events(int(accounts), int(assets), int(years), frequency)
+    print(f"Wrote {write_log(file_name, events):,} events to {file_name}")
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) >= 5, (
+        "Usage: event_generator.py <file> <accounts> <assets> <years> "
+        "[daily|weekly|monthly|quarterly|yearly]"
+    )
+
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+from decimal import Decimal
+import sys
+import time
+from typing import Any, Callable, List, SupportsFloat, Type, cast
+from harvest.events import Allocation, Money
+
+
+class LegacyMoney:
+    # the Decimal-backed Money class prior to the fixed-point one, kept as the baseline
+    def __init__(self, amount: Decimal):
+        self.amount = amount
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LegacyMoney):
+            return self.amount == other.amount
+        else:
+            return self.amount == other
+
+    def __repr__(self) -> str:
+        sign = "" if abs(self.amount) == self.amount else "-"
+        rounded = str(round(abs(self.amount), 2))
+        dollars, cents = rounded.split(".")
+
+        output = list(reversed(cents))
+        output.append(".")
+        for i, ch in enumerate(reversed(dollars)):
+            if i != 0 and i % 3 == 0:
+                output.append(",")
+            output.append(ch)
+
+        output.append(sign)
+
+        return "".join(reversed(output))
+
+    def __add__(self, other: Any | SupportsFloat) -> Any:
+        if isinstance(other, LegacyMoney):
+            # cast() is a work-around for a mypy issue: https://github.com/python/mypy/issues/12800
+            return cast(Any, LegacyMoney(self.amount + other.amount))
+        elif isinstance(other, SupportsFloat):
+            return cast(Any, LegacyMoney(self.amount + Decimal(float(other))))
+        else:
+            raise ValueError("Attempting to add {} to Money".format(type(other)))
+
+    def __sub__(self, other: Any | SupportsFloat) -> Any:
+        if isinstance(other, LegacyMoney):
+            return cast(Any, LegacyMoney(self.amount - other.amount))
+        elif isinstance(other, SupportsFloat):
+            return cast(Any, LegacyMoney(self.amount - Decimal(float(other))))
+        else:
+            raise ValueError("Attempting to subtract {} from Money".format(type(other)))
+
+    def __mul__(self, other: Any | SupportsFloat) -> Any:
+        if isinstance(other, LegacyMoney):
+            return cast(Any, LegacyMoney(self.amount * other.amount))
+        elif isinstance(other, SupportsFloat):
+            return cast(Any, LegacyMoney(self.amount * Decimal(float(other))))
+        else:
+            raise ValueError("Attempting to multiply {} and Money".format(type(other)))
+
+    def __truediv__(self, other: Any | SupportsFloat) -> Decimal:
+        if isinstance(other, LegacyMoney):
+            return self.amount / other.amount
+        elif isinstance(other, SupportsFloat):
+            return self.amount / Decimal(float(other))
+        else:
+            raise ValueError("Attempting to divide Money by {}".format(type(other)))
+
+
+ALLOCATION = Allocation(
+    stock_large=Decimal("70.5"),
+    stock_mid_small=Decimal("6.5"),
+    stock_intl=Decimal("0.1"),
+    bond_us=Decimal("7.71"),
+    bond_intl=Decimal("1.2"),
+    cash=Decimal("3.45"),
+)
+
+
+def report_workload(money: Type, amounts: List[Decimal]) -> List[str]:
+    # what Report.compute does with Money for each record: subtotals, running totals
+    # and formatting
+    totals = [money(Decimal("0"))] * 10
+    for amount in amounts:
+        total = money(amount * Decimal("12.34"))
+        row = [v for v in ALLOCATION.subtotals(total).values()] + [total]
+        totals = [t + v for t, v in zip(totals, row)]
+
+    return [repr(total) for total in totals]
+
+
+def benchmark(name: str, fn: Callable[[], Any], count: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>10}: {count / elapsed:12,.0f} records/sec ({elapsed:.3f}s)")
+    return elapsed
+
+
+def main(count: int) -> None:
+    amounts = [Decimal(i) / 100 for i in range(count)]
+    assert report_workload(LegacyMoney, amounts[:1000]) == report_workload(
+        Money, amounts[:1000]
+    )
+
+    legacy = benchmark("legacy", lambda: report_workload(LegacyMoney, amounts), count)
+    current = benchmark("current", lambda: report_workload(Money, amounts), count)
+    print(f"{'speedup':>10}: {legacy / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
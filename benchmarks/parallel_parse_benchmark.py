@@ -0,0 +1,59 @@
+from datetime import timedelta
+from functools import partial
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+from harvest.actions import latest_matching_events
+from harvest.event_log import iter_events, map_ranges, read_events_parallel
+from harvest.events import Event
+from harvest.report import latest_events
+from event_generator import take_events, write_log
+
+
+def timed(name: str, fn: Callable[[], List[Event]], baseline: float | None) -> float:
+    start = time.perf_counter()
+    events = fn()
+    elapsed = time.perf_counter() - start
+
+    speedup = f" {baseline / elapsed:5.2f}x" if baseline else ""
+    print(f"{name:>28}: {elapsed:8.3f}s ({len(events):,} events){speedup}")
+    return elapsed
+
+
+def main(count: int) -> None:
+    # the process pool only helps with as many cores as there are workers
+    cores = os.cpu_count() or 1
+    workers = sorted({2, 4, cores} | ({8} if cores >= 8 else set()))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        events_file = os.path.join(tmp_dir, "harvest.benchmark.jsonl")
+        write_log(events_file, take_events(count, accounts=20, assets=100))
+        report_date = max(evt.date for evt in iter_events(events_file)) + timedelta(1)
+        print(
+            f"{count:,} events, {os.path.getsize(events_file):,} bytes, {cores} cores"
+        )
+
+        sequential = timed("parse", lambda: list(iter_events(events_file)), None)
+        for n in workers:
+            timed(
+                f"parse {n} workers",
+                lambda: read_events_parallel(events_file, n),
+                sequential,
+            )
+
+        reduce = partial(latest_matching_events, date=report_date, account=None)
+        sequential = timed("latest events", lambda: reduce(events_file, 0, None), None)
+        for n in workers:
+            timed(
+                f"latest events {n} workers",
+                lambda: latest_events(
+                    itertools.chain.from_iterable(map_ranges(reduce, events_file, n))
+                ),
+                sequential,
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
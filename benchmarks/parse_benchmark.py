@@ -0,0 +1,85 @@
+from datetime import date
+import json
+import sys
+import time
+from typing import Callable, List
+from harvest.events import (
+    Event,
+    UnknownEvent,
+    parse_event,
+    parse_event_json,
+    to_event_json,
+)
+from event_generator import take_events
+
+
+def legacy_parse_event_json(data: str) -> Event:
+    # the parser prior to the table-driven one, kept here as the baseline
+    evt = json.loads(data)
+    dte = date.fromisoformat(evt["date"])
+    allocation = evt.get("allocation", {})
+    allocation_args = [
+        allocation.get(key)
+        for key in (
+            "stock_large",
+            "stock_mid_small",
+            "stock_intl",
+            "bond_us",
+            "bond_intl",
+            "cash",
+        )
+    ]
+
+    if evt["type"] == "SetBalance":
+        return parse_event(
+            "set_balance",
+            dte,
+            evt["account"],
+            evt["asset"],
+            evt["amount"],
+            evt["created_at"],
+        )
+    elif evt["type"] == "SetPrice":
+        return parse_event(
+            "set_price", dte, evt["asset"], evt["amount"], evt["created_at"]
+        )
+    elif evt["type"] == "SetAllocation":
+        return parse_event(
+            "set_allocation", dte, evt["asset"], *allocation_args, evt["created_at"]
+        )
+    elif evt["type"] == "SetTargetAllocation":
+        return parse_event(
+            "set_target_allocation", dte, *allocation_args, evt["created_at"]
+        )
+    else:
+        return UnknownEvent(event=data)
+
+
+def generate_lines(count: int) -> List[str]:
+    return [to_event_json(evt) for evt in take_events(count, accounts=5, assets=50)]
+
+
+def benchmark(name: str, parser: Callable[[str], Event], lines: List[str]) -> float:
+    start = time.perf_counter()
+    for line in lines:
+        parser(line)
+    elapsed = time.perf_counter() - start
+
+    rate = len(lines) / elapsed
+    print(f"{name:>10}: {rate:12,.0f} events/sec ({elapsed:.3f}s)")
+    return rate
+
+
+def main(count: int) -> None:
+    lines = generate_lines(count)
+    assert [legacy_parse_event_json(line) for line in lines[:100]] == [
+        parse_event_json(line) for line in lines[:100]
+    ]
+
+    legacy = benchmark("legacy", legacy_parse_event_json, lines)
+    current = benchmark("current", parse_event_json, lines)
+    print(f"{'speedup':>10}: {current / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
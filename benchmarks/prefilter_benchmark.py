@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+from harvest.event_log import iter_events
+from harvest.events import Event, EventPrefilter, event_matcher
+from event_generator import take_events, write_log
+
+
+def timed(name: str, fn: Callable[[], List[Event]], baseline: float | None) -> float:
+    start = time.perf_counter()
+    events = fn()
+    elapsed = time.perf_counter() - start
+
+    speedup = f" {baseline / elapsed:5.2f}x" if baseline else ""
+    print(f"{name:>40}: {elapsed:8.3f}s ({len(events):,} events){speedup}")
+    return elapsed
+
+
+def main(count: int) -> None:
+    # the fewer events a report selects, the more decoding the prefilter saves
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        events_file = os.path.join(tmp_dir, "harvest.benchmark.jsonl")
+        write_log(events_file, take_events(count, accounts=20, assets=100))
+        dates = sorted({evt.date for evt in iter_events(events_file)})
+        print(f"{count:,} events, {os.path.getsize(events_file):,} bytes")
+
+        cases = [
+            ("all accounts, last date", dates[-1], None),
+            ("all accounts, median date", dates[len(dates) // 2], None),
+            ("one account, last date", dates[-1], "account0"),
+        ]
+        for name, target_date, account in cases:
+            matcher = event_matcher(target_date, account)
+            baseline = timed(
+                f"{name} (full)",
+                lambda: list(filter(matcher, iter_events(events_file))),
+                None,
+            )
+            prefilter = EventPrefilter.for_report(target_date, account)
+            timed(
+                f"{name} (prefiltered)",
+                lambda: list(iter_events(events_file, prefilter=prefilter)),
+                baseline,
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,29 @@
+import time
+from harvest.events import RunReport
+from harvest.report import Report
+from event_generator import holdings_per_account, take_events
+
+
+def benchmark(accounts: int, assets: int, count: int) -> None:
+    events = list(take_events(count, accounts, assets))
+    report_event = RunReport(max(evt.date for evt in events))
+
+    start = time.perf_counter()
+    report = Report.create(report_event, events)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{accounts * holdings_per_account(assets):>9,} holdings {count:>11,} events: {elapsed:8.3f}s "
+        f"({elapsed / count * 1e6:.2f} us/event, {len(report.records):,} records)"
+    )
+
+
+def main() -> None:
+    # time per event should stay flat as both holdings and events grow
+    for accounts, assets in ((5, 20), (20, 100), (50, 400)):
+        for count in (10000, 100000, 1000000):
+            benchmark(accounts, assets, count)
+
+
+if __name__ == "__main__":
+    main()
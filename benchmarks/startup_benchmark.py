@@ -0,0 +1,89 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Set, Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+MAIN = os.path.join(SRC_DIR, "main.py")
+# import time of the event-write commands on top of the bare interpreter
+STARTUP_BUDGET_MS = 100
+RUNS = 10
+
+COMMANDS = {
+    "set_balance": [
+        "set_balance",
+        "2022-01-01",
+        "account1",
+        "XYZ",
+        "1.5",
+        "2022-01-01T00:00:00+00:00",
+    ],
+    "set_price": [
+        "set_price",
+        "2022-01-01",
+        "XYZ",
+        "10.25",
+        "2022-01-01T00:00:00+00:00",
+    ],
+}
+
+
+def import_times(args: List[str], cwd: str) -> Dict[str, float]:
+    # cumulative import time in ms of each top-level module, from -X importtime
+    env = {**os.environ, "PYTHONPATH": SRC_DIR, "PYTHON_ENV": "benchmark"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative) / 1000
+
+    return modules
+
+
+def median_import_time(
+    args: List[str], cwd: str, exclude: Set[str] = set()
+) -> Tuple[float, Dict[str, float]]:
+    # modules the bare interpreter also imports (site, encodings) are left out
+    runs = []
+    for _ in range(RUNS):
+        modules = {
+            name: ms
+            for name, ms in import_times(args, cwd).items()
+            if name not in exclude
+        }
+        runs.append((sum(modules.values()), modules))
+
+    return statistics.median(total for total, _ in runs), runs[-1][1]
+
+
+def main() -> None:
+    over_budget = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        interpreter = set(import_times(["-c", "pass"], tmp_dir))
+        for name, args in COMMANDS.items():
+            total, modules = median_import_time([MAIN, *args], tmp_dir, interpreter)
+            over_budget = over_budget or total > STARTUP_BUDGET_MS
+            slowest = sorted(modules.items(), key=lambda item: -item[1])[:3]
+            print(
+                f"{name:>12}: {total:6.1f}ms of imports (budget {STARTUP_BUDGET_MS}ms), "
+                + ", ".join(f"{module} {ms:.1f}ms" for module, ms in slowest)
+            )
+
+    if over_budget:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
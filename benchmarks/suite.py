@@ -0,0 +1,143 @@
+import argparse
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple, TypeVar
+from harvest.actions import read_events
+from harvest.event_log import iter_event_lines
+from harvest.events import Event, RunReport, parse_event_json
+from harvest.report import Report
+from event_generator import take_events, write_log
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# a phase slower than its baseline by more than this factor is reported as a regression
+REGRESSION_THRESHOLD = 1.25
+# phases are recorded relative to the time of a fixed workload on the same machine, so
+# a baseline saved on one machine can be compared with runs on another
+CALIBRATION_LINE = '{"type": "SetPrice", "date": "2022-05-01", "amount": "12.34"}'
+CALIBRATION_LOOPS = 100_000
+CALIBRATION_ROUNDS = 3
+
+# accounts and assets of the log generated for each size
+SIZES: Dict[int, Tuple[int, int]] = {
+    10_000: (5, 20),
+    1_000_000: (20, 100),
+    10_000_000: (50, 200),
+}
+
+T = TypeVar("T")
+
+
+def timed(timings: Dict[str, float], phase: str, fn: Callable[[], T]) -> T:
+    start = time.perf_counter()
+    result = fn()
+    timings[phase] = time.perf_counter() - start
+    return result
+
+
+def calibrate() -> float:
+    def workload() -> None:
+        for _ in range(CALIBRATION_LOOPS):
+            Decimal(json.loads(CALIBRATION_LINE)["amount"])
+
+    rounds = []
+    for _ in range(CALIBRATION_ROUNDS):
+        start = time.perf_counter()
+        workload()
+        rounds.append(time.perf_counter() - start)
+
+    return min(rounds)
+
+
+def parse_lines(lines: List[bytes]) -> List[Event]:
+    return list(map(parse_event_json, lines))
+
+
+def run(count: int) -> Dict[str, float]:
+    accounts, assets = SIZES[count]
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        events_file = os.path.join(tmp_dir, "harvest.benchmark.jsonl")
+        write_log(events_file, take_events(count, accounts, assets))
+        lines = list(iter_event_lines(events_file))
+
+        events = timed(timings, "read_events", lambda: read_events(events_file))
+        timed(timings, "parse_event_json", partial(parse_lines, lines))
+        del lines
+
+        report_event = RunReport(max(evt.date for evt in events) + timedelta(days=1))
+        report = timed(
+            timings, "Report.create", lambda: Report.create(report_event, events)
+        )
+        timed(timings, "Report.compute", report.compute)
+        output = os.path.join(tmp_dir, "harvest.csv")
+        timed(timings, "write_to_file", lambda: report.write_to_file(output))
+
+    return timings
+
+
+def load_baseline() -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+
+    with open(BASELINE_FILE) as file:
+        return json.load(file)
+
+
+def compare(
+    count: int, timings: Dict[str, float], unit: float, baseline: Dict[str, float]
+) -> bool:
+    regressed = False
+    print(f"{count:,} events")
+    for phase, elapsed in timings.items():
+        relative = elapsed / unit
+        if expected := baseline.get(phase):
+            ratio = relative / expected
+            flag = "REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+            regressed = regressed or bool(flag)
+            print(
+                f"{phase:>18}: {elapsed:9.3f}s  {relative:9.2f}u  baseline "
+                f"{expected:9.2f}u  {ratio:5.2f}x {flag}"
+            )
+        else:
+            print(f"{phase:>18}: {elapsed:9.3f}s  {relative:9.2f}u  no baseline")
+
+    return regressed
+
+
+def main(sizes: List[int], save: bool) -> None:
+    baseline = load_baseline()
+    unit = calibrate()
+    print(f"calibration: {unit:.3f}s per unit (u)")
+    regressed = False
+    for count in sizes:
+        timings = run(count)
+        regressed = (
+            compare(count, timings, unit, baseline.get(str(count), {})) or regressed
+        )
+        baseline[str(count)] = {
+            phase: elapsed / unit for phase, elapsed in timings.items()
+        }
+
+    if save:
+        with open(BASELINE_FILE, "w") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+
+    if regressed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 1_000_000])
+    parser.add_argument("--save", action="store_true", help="store as the baseline")
+    args = parser.parse_args()
+    if unknown := [count for count in args.sizes if count not in SIZES]:
+        parser.error(f"unknown sizes {unknown}, expected any of {list(SIZES)}")
+
+    main(args.sizes, args.save)
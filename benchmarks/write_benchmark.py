@@ -0,0 +1,53 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+from harvest.actions import open_event_writer, write_event
+from harvest.events import Asset, Event, SetBalance
+
+
+def generate_events(count: int) -> List[Event]:
+    asset = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    return [
+        SetBalance(f"account{i % 10}", asset, date(2022, 1, 1), Decimal(i) / 100, now)
+        for i in range(count)
+    ]
+
+
+def write_one_at_a_time(events: List[Event], file_name: str) -> None:
+    for evt in events:
+        write_event(evt, file_name=file_name)
+
+
+def write_batched(events: List[Event], file_name: str) -> None:
+    with open_event_writer(file_name) as writer:
+        for evt in events:
+            writer.write(evt)
+
+
+def benchmark(
+    name: str, writer: Callable[[List[Event], str], None], suffix: str, count: int
+) -> None:
+    events = generate_events(count)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, f"harvest{suffix}")
+        start = time.perf_counter()
+        writer(events, file_name)
+        elapsed = time.perf_counter() - start
+
+    print(f"{name:>24} {suffix:>9}: {count / elapsed:>12,.0f} events/s")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for suffix in (".jsonl", ".sqlite3"):
+        benchmark("write_event", write_one_at_a_time, suffix, count)
+        benchmark("open_event_writer", write_batched, suffix, count)
+
+
+if __name__ == "__main__":
+    main()
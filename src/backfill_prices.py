@@ -0,0 +1,28 @@
+import sys
+from datetime import date
+from harvest.actions import read_events
+from harvest.events import SetBalance
+from harvest.price_store import PRICE_STORE_ENV, open_default_price_store
+from harvest.quotes import fill_price_store
+
+
+def main(events_path, start, end):
+    assets = {
+        evt.asset for evt in read_events(events_path) if isinstance(evt, SetBalance)
+    }
+    with open_default_price_store(events_path) as store:
+        if store is None:
+            raise RuntimeError(f"The price store is disabled by {PRICE_STORE_ENV}")
+
+        fetched = fill_price_store(assets, start, end, store)
+
+    print(
+        f"Fetched {fetched} missing ranges for {len(assets)} assets into {store.file_name}"
+    )
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) in (3, 4)
+
+    end = date.fromisoformat(sys.argv[3]) if len(sys.argv) == 4 else date.today()
+    main(sys.argv[1], date.fromisoformat(sys.argv[2]), end)
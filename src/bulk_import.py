@@ -0,0 +1,16 @@
+import sys
+from harvest.importer import import_csv
+
+
+def main(output_path, input_paths):
+    result = import_csv(input_paths, output_path)
+    print(
+        f"Imported {result.imported} events into {output_path}, "
+        f"skipped {result.skipped} duplicates"
+    )
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) >= 3
+
+    main(sys.argv[1], sys.argv[2:])
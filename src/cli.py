@@ -4,8 +4,10 @@ from enum import Enum
 import inspect
 import os
 import re
+import sys
 from typing import Dict
-from harvest.actions import write_event
+from harvest.actions import events_file_name, open_event_writer
+from harvest.event_log import DEFAULT_FLUSH_EVERY
 from harvest.events import (
     Allocation,
     Asset,
@@ -66,80 +68,87 @@ def create_event(event_class, args: Dict) -> Event:
 
 def main():
     env = (os.getenv("PYTHON_ENV") or "DEV").lower()
-    events_file = f"harvest.{env}.jsonl"
+    events_file = events_file_name(env, store=os.getenv("HARVEST_EVENT_STORE"))
     prompt = to_prompt("event")
     cur_event = None
     state = State.SET_EVENT
     kwargs = {"date": str(date.today())}
 
-    while True:
-        line = input(prompt)
-        if line in ("q", "quit", "exit"):
-            break
-        elif state == State.SET_EVENT:
-            cur_event = resolve_event(line, cur_event)
-            if cur_event:
-                state = State.SET_DATE
-                prompt = to_prompt("date", default=kwargs.get("date"))
-        elif state == State.SET_DATE:
-            if len(line) > 0:
-                kwargs["date"] = line
-            if cur_event == SetTargetAllocation:
-                state = State.SET_ALLOCATION
-                prompt = to_prompt(
-                    "allocation(stock - lg, stock - md/sm, stock - intl, bond - us, bond - intl, cash)"
-                )
-            else:
-                state = State.SET_ASSET
-                default_asset = kwargs.get("asset")
-                prompt = to_prompt(
-                    "asset", default=default_asset.identifier if default_asset else None
-                )
-        elif state == State.SET_ASSET:
-            if len(line) > 0:
-                id = line.upper()
-                if id.startswith("$"):
-                    # prefix all cash assets symbols with $
-                    kwargs["asset"] = Asset.cash(identifier=id[1:])
+    # an interactive session persists every event as it is entered, while piped input
+    # is written in batches
+    flush_every = 1 if sys.stdin.isatty() else DEFAULT_FLUSH_EVERY
+    with open_event_writer(events_file, flush_every=flush_every) as writer:
+        while True:
+            line = input(prompt)
+            if line in ("q", "quit", "exit"):
+                break
+            elif state == State.SET_EVENT:
+                cur_event = resolve_event(line, cur_event)
+                if cur_event:
+                    state = State.SET_DATE
+                    prompt = to_prompt("date", default=kwargs.get("date"))
+            elif state == State.SET_DATE:
+                if len(line) > 0:
+                    kwargs["date"] = line
+                if cur_event == SetTargetAllocation:
+                    state = State.SET_ALLOCATION
+                    prompt = to_prompt(
+                        "allocation(stock - lg, stock - md/sm, stock - intl, bond - us, bond - intl, cash)"
+                    )
                 else:
-                    kwargs["asset"] = Asset.for_symbol(id)
-            if kwargs.get("asset") and cur_event == SetBalance:
-                state = State.SET_ACCOUNT
-                prompt = to_prompt("account", default=kwargs.get("account"))
-            elif kwargs.get("asset") and cur_event == SetPrice:
-                state = State.SET_AMOUNT
-                prompt = to_prompt("amount")
-            elif kwargs.get("asset") and cur_event == SetAllocation:
-                state = State.SET_ALLOCATION
-                prompt = to_prompt(
-                    "allocation(stock - lg, stock - md/sm, stock - intl, bond - us, bond - intl, cash)"
-                )
-        elif state == State.SET_ACCOUNT:
-            if len(line) > 0:
-                kwargs["account"] = line
-            if kwargs.get("account"):
-                state = State.SET_AMOUNT
-                prompt = to_prompt("amount")
-        elif state == State.SET_AMOUNT and len(line) > 0:
-            kwargs["amount"] = line
-            state = State.SET_EVENT
-            prompt = to_prompt(
-                "event",
-                default="_".join(camel_to_snake(cur_event.__name__).split("_")[1:]),
-            )
-            evt = create_event(cur_event, kwargs)
-            write_event(evt, file_name=events_file)
-        elif state == State.SET_ALLOCATION and len(line) > 0:
-            amounts = [Decimal(amt) for amt in line.split(" ")]
-            if len(amounts) == 6:
-                kwargs["allocation"] = Allocation(*amounts)
-                evt = create_event(cur_event, kwargs)
+                    state = State.SET_ASSET
+                    default_asset = kwargs.get("asset")
+                    prompt = to_prompt(
+                        "asset",
+                        default=default_asset.identifier if default_asset else None,
+                    )
+            elif state == State.SET_ASSET:
+                if len(line) > 0:
+                    id = line.upper()
+                    if id.startswith("$"):
+                        # prefix all cash assets symbols with $
+                        kwargs["asset"] = Asset.cash(identifier=id[1:])
+                    else:
+                        kwargs["asset"] = Asset.for_symbol(id)
+                if kwargs.get("asset") and cur_event == SetBalance:
+                    state = State.SET_ACCOUNT
+                    prompt = to_prompt("account", default=kwargs.get("account"))
+                elif kwargs.get("asset") and cur_event == SetPrice:
+                    state = State.SET_AMOUNT
+                    prompt = to_prompt("amount")
+                elif kwargs.get("asset") and cur_event == SetAllocation:
+                    state = State.SET_ALLOCATION
+                    prompt = to_prompt(
+                        "allocation(stock - lg, stock - md/sm, stock - intl, bond - us, bond - intl, cash)"
+                    )
+            elif state == State.SET_ACCOUNT:
+                if len(line) > 0:
+                    kwargs["account"] = line
+                if kwargs.get("account"):
+                    state = State.SET_AMOUNT
+                    prompt = to_prompt("amount")
+            elif state == State.SET_AMOUNT and len(line) > 0:
+                kwargs["amount"] = line
                 state = State.SET_EVENT
                 prompt = to_prompt(
                     "event",
                     default="_".join(camel_to_snake(cur_event.__name__).split("_")[1:]),
                 )
-                write_event(evt, file_name=events_file)
+                evt = create_event(cur_event, kwargs)
+                writer.write(evt)
+            elif state == State.SET_ALLOCATION and len(line) > 0:
+                amounts = [Decimal(amt) for amt in line.split(" ")]
+                if len(amounts) == 6:
+                    kwargs["allocation"] = Allocation(*amounts)
+                    evt = create_event(cur_event, kwargs)
+                    state = State.SET_EVENT
+                    prompt = to_prompt(
+                        "event",
+                        default="_".join(
+                            camel_to_snake(cur_event.__name__).split("_")[1:]
+                        ),
+                    )
+                    writer.write(evt)
 
 
 if __name__ == "__main__":
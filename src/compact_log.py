@@ -0,0 +1,16 @@
+import sys
+from harvest.compaction import compact_log
+from harvest.actions import is_jsonl_log
+
+
+def main(events_path):
+    assert is_jsonl_log(events_path), "only JSONL logs can be compacted"
+
+    result = compact_log(events_path)
+    print(f"Kept {result.kept} events in {events_path}, dropped {result.dropped}")
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) == 2
+
+    main(sys.argv[1])
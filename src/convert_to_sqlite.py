@@ -0,0 +1,13 @@
+import sys
+from harvest.sqlite_store import import_jsonl
+
+
+def main(input_path, output_path):
+    count = import_jsonl(input_path, output_path)
+    print(f"Imported {count} events into {output_path}")
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) == 3
+
+    main(sys.argv[1], sys.argv[2])
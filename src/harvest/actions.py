@@ -1,35 +1,118 @@
-from datetime import date, datetime, timezone
-import json
-from typing import List, Iterable, Sequence
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+import itertools
+from typing import TYPE_CHECKING, Any, Dict, List, Iterable, Sequence, Set, Tuple
 import logging
-from harvest.report import Report
+import os
+import sys
+import time
+from harvest.event_log import (
+    BatchedEventWriter,
+    EventWriter,
+    complete_size,
+    iter_events,
+    map_ranges,
+    parallel_workers,
+    read_events_parallel,
+)
+from harvest.report import (
+    LiveReport,
+    Report,
+    event_date,
+    latest_events,
+    report_series,
+    series_dates,
+    write_series,
+)
 from harvest.events import (
     Asset,
     Event,
-    EventEncoder,
+    EventPrefilter,
     FileWritten,
     RunReport,
+    RunReportSeries,
     SetAllocation,
     SetBalance,
     SetPrice,
     UnknownEvent,
-    parse_event_json,
+    WatchReport,
+    event_matcher,
 )
-from harvest.quotes import lookup_prices
+from harvest.snapshots import iter_events_as_of
+from harvest import instrumentation
+
+if TYPE_CHECKING:
+    from harvest.quotes import Quote
+
+EVENT_STORE_EXTENSIONS = {
+    "jsonl": "jsonl",
+    "sqlite": "sqlite3",
+    "partitioned": "partitioned",
+}
+# how far before the target date a quote is looked up, as QUOTE_LOOKBACK_DAYS in
+# harvest.quotes (which isn't imported until a quote is fetched)
+QUOTE_LOOKBACK_DAYS = 7
+# the store suffixes of harvest.sqlite_store and harvest.partitioned_log, which load
+# sqlite3 and the partition machinery, so they are only imported for such stores
+SQLITE_EXTENSIONS = (".sqlite3", ".sqlite", ".db")
+PARTITIONED_EXTENSION = ".partitioned"
 
 logger = logging.getLogger(__name__)
 
 
+def events_file_name(env: str, store: str | None = None) -> str:
+    store = (store or "jsonl").lower()
+    if store not in EVENT_STORE_EXTENSIONS:
+        raise ValueError(f"Unknown event store: {store}")
+
+    return f"harvest.{env}.{EVENT_STORE_EXTENSIONS[store]}"
+
+
+def is_sqlite_store(file_name: str) -> bool:
+    return file_name.endswith(SQLITE_EXTENSIONS)
+
+
+def is_partitioned_log(file_name: str) -> bool:
+    return file_name.endswith(PARTITIONED_EXTENSION)
+
+
+def is_jsonl_log(file_name: str) -> bool:
+    return not (is_sqlite_store(file_name) or is_partitioned_log(file_name))
+
+
+def open_event_writer(file_name: str, **kwargs: Any) -> BatchedEventWriter:
+    if is_sqlite_store(file_name):
+        from harvest import sqlite_store
+
+        return sqlite_store.SqliteEventWriter(file_name, **kwargs)
+    elif is_partitioned_log(file_name):
+        from harvest import partitioned_log
+
+        return partitioned_log.PartitionedEventWriter(file_name, **kwargs)
+
+    return EventWriter(file_name, **kwargs)
+
+
 def write_event(command: Event, file_name: str) -> None:
-    with open(file_name, "a") as file:
-        command.__dict__["type"] = type(command).__name__
-        file.write(json.dumps(command, cls=EventEncoder))
-        file.write("\n")
+    with open_event_writer(file_name) as writer:
+        writer.write(command)
 
 
 def read_events(file_name: str) -> List[Event]:
-    with open(file_name, "r") as file:
-        events = [parse_event_json(line.strip()) for line in file.readlines()]
+    if is_sqlite_store(file_name):
+        from harvest import sqlite_store
+
+        return sqlite_store.read_events(file_name)
+    elif is_partitioned_log(file_name):
+        from harvest import partitioned_log
+
+        return list(partitioned_log.read_events(file_name))
+
+    if workers := parallel_workers(file_name):
+        events = read_events_parallel(file_name, workers)
+    else:
+        events = list(iter_events(file_name))
 
     logger.debug("Read %i events from file %s", len(events), file_name)
     return events
@@ -45,32 +128,275 @@ def handle_event(command: Event, events_file: str | None = None) -> None:
         case SetAllocation() as sa:
             write_event(sa, file_name=events_file)
         case RunReport(date, account) as rr:
-            events = read_events(file_name=events_file)
-            assets = {e.asset for e in events if isinstance(e, SetBalance)}
-            events.extend(generate_set_price_events(assets, date))
-            report = Report.create(rr, events)
+            # the sqlite store and the parallel parser read eagerly, so the stream is
+            # opened within the phase
+            with instrumentation.phase("read_events"):
+                if is_sqlite_store(events_file):
+                    from harvest import sqlite_store
+
+                    stream = sqlite_store.read_events(events_file, date, account)
+                elif is_partitioned_log(events_file):
+                    from harvest import partitioned_log
+
+                    stream = partitioned_log.read_events(events_file, date, account)
+                elif workers := parallel_workers(events_file):
+                    # each worker reduces its part of the log, rather than sending
+                    # every parsed event back
+                    stream = itertools.chain.from_iterable(
+                        map_ranges(
+                            partial(latest_matching_events, date=date, account=account),
+                            events_file,
+                            workers,
+                        )
+                    )
+                else:
+                    stream = iter_events_as_of(
+                        events_file,
+                        date,
+                        prefilter=EventPrefilter.for_report(date, account),
+                    )
+                events = latest_events(matching_events(date, account, stream))
+            with instrumentation.phase("fetch_prices"):
+                events.extend(resolve_prices(events, date, events_file=events_file))
+            with instrumentation.phase("create_report"):
+                report = Report.create(rr, events)
             handle_event(
                 FileWritten(
-                    path=report.write_to_file(),
+                    path=report.write_to_file(rr.output),
                     incomplete_symbols={
                         asset.identifier for asset in report.incomplete_assets
                     },
                 ),
                 events_file=events_file,
             )
+        case RunReportSeries(start, end, frequency, account, layout) as series:
+            with instrumentation.phase("read_events"):
+                if is_sqlite_store(events_file):
+                    from harvest import sqlite_store
+
+                    stream = sqlite_store.read_events(events_file, end, account)
+                elif is_partitioned_log(events_file):
+                    from harvest import partitioned_log
+
+                    stream = partitioned_log.read_events(events_file, end, account)
+                elif workers := parallel_workers(events_file):
+                    stream = read_events_parallel(
+                        events_file, workers, EventPrefilter.for_report(end, account)
+                    )
+                else:
+                    stream = iter_events(
+                        events_file, prefilter=EventPrefilter.for_report(end, account)
+                    )
+                events = list(matching_events(end, account, stream))
+            dates = series_dates(start, end, frequency)
+            with instrumentation.phase("fetch_prices"):
+                events.extend(
+                    resolve_series_prices(events, dates, events_file=events_file)
+                )
+            with instrumentation.phase("write_series"):
+                path, incomplete_assets = write_series(
+                    report_series(series, events), layout=layout
+                )
+            handle_event(
+                FileWritten(
+                    path=path,
+                    incomplete_symbols={
+                        asset.identifier for asset in incomplete_assets
+                    },
+                ),
+                events_file=events_file,
+            )
+        case WatchReport(date, account):
+            if not is_jsonl_log(events_file):
+                print(f"Watching is only supported for JSONL logs: {events_file}")
+            else:
+                watch_report(RunReport(date, account), events_file=events_file)
         case FileWritten(path, incomplete_symbols):
+            # keep stdout to the report itself when it's written there
             print(
                 "Report written to file: {} (incomplete symbols: {})".format(
                     path, incomplete_symbols
-                )
+                ),
+                file=sys.stderr if path == "-" else sys.stdout,
             )
         case UnknownEvent(event):
             print(f"Unknown event: {event}")
 
 
-def generate_set_price_events(assets: Iterable[Asset], date: date) -> List[SetPrice]:
+def latest_matching_events(
+    file_name: str, start: int, end: int, date: date, account: str | None
+) -> List[Event]:
+    prefilter = EventPrefilter.for_report(date, account)
+    return latest_events(iter_events(file_name, start, end, prefilter))
+
+
+def matching_events(
+    target_date: date, target_account: str | None, events: Iterable[Event]
+) -> Iterable[Event]:
+    # events_parsed counts the events handed to the report once built, so not those
+    # skipped by a prefilter nor, on the parallel path, those each worker reduced away
+    matched = filter(
+        event_matcher(target_date, target_account),
+        instrumentation.counted("events_parsed", events),
+    )
+    return instrumentation.counted("events_matched", matched)
+
+
+def watch_report(
+    report_event: RunReport, events_file: str, poll_interval: float = 0.05
+) -> None:
+    report = LiveReport(report_event)
+    offset = 0
+    prices_resolved = False
+    while True:
+        size = os.path.getsize(events_file) if os.path.exists(events_file) else 0
+        if size < offset:
+            # the log was rewritten, start over
+            report = LiveReport(report_event)
+            offset = 0
+
+        if size > offset:
+            end = complete_size(events_file)
+            changed = report.apply_all(iter_events(events_file, offset, end))
+            offset = end
+
+            if changed:
+                path = report.write_to_file()
+                logger.debug("Applied %i events, report written to %s", changed, path)
+                print(f"Report updated: {path} ({changed} events)", flush=True)
+
+            if not prices_resolved:
+                # fetched prices are appended to the log and applied on the next poll
+                resolve_prices(
+                    report.builder.events(), report_event.date, events_file=events_file
+                )
+                prices_resolved = True
+
+        time.sleep(poll_interval)
+
+
+def is_price_current(price: SetPrice | None, target_date: date) -> bool:
+    if price is None:
+        return False
+
+    # a quote dated shortly before the target date is still current if it was recorded
+    # on or after the target date, since it was the most recent quote available
+    # (weekends, holidays, etc.), but an older quote recorded later (a backfill) isn't
+    if price.date == target_date:
+        return True
+
+    return (
+        price.date >= target_date - timedelta(days=QUOTE_LOOKBACK_DAYS)
+        and price.created_at.date() >= target_date
+    )
+
+
+def latest_prices(events: Iterable[Event], target_date: date) -> Dict[Asset, SetPrice]:
+    prices: Dict[Asset, SetPrice] = {}
+    for evt in events:
+        if isinstance(evt, SetPrice) and evt.date <= target_date:
+            current = prices.get(evt.asset)
+            if current is None or evt.date >= current.date:
+                prices[evt.asset] = evt
+
+    return prices
+
+
+def resolve_prices(
+    events: Sequence[Event], target_date: date, events_file: str
+) -> List[SetPrice]:
+    assets = {e.asset for e in events if isinstance(e, SetBalance)}
+    prices = latest_prices(events, target_date)
+    stale = {
+        asset
+        for asset in assets
+        if not is_price_current(prices.get(asset), target_date)
+    }
+    logger.debug(
+        "Prices for %i of %i assets are missing or stale", len(stale), len(assets)
+    )
+
+    set_price_events = (
+        generate_set_price_events(stale, target_date, events_file) if stale else []
+    )
+    for evt in set_price_events:
+        write_event(evt, file_name=events_file)
+
+    return set_price_events
+
+
+def resolve_series_prices(
+    events: Sequence[Event], dates: Sequence[date], events_file: str
+) -> List[SetPrice]:
+    first_held: Dict[Asset, date] = {}
+    prices: Dict[Asset, List[SetPrice]] = {}
+    for evt in events:
+        match evt:
+            case SetBalance(_, asset, dte):
+                first_held[asset] = min(dte, first_held.get(asset, dte))
+            case SetPrice(asset) as sp:
+                prices.setdefault(asset, []).append(sp)
+
+    stale: Dict[Asset, Set[date]] = {}
+    for asset, first in first_held.items():
+        asset_prices = sorted(prices.get(asset, []), key=event_date)
+        for dte in dates:
+            idx = bisect_right(asset_prices, dte, key=event_date)
+            latest = asset_prices[idx - 1] if idx > 0 else None
+            if dte >= first and not is_price_current(latest, dte):
+                stale.setdefault(asset, set()).add(dte)
+
+    stale_dates = sorted(set().union(*stale.values()))
+    logger.debug(
+        "Prices for %i of %i assets are missing or stale on %i dates",
+        len(stale),
+        len(first_held),
+        len(stale_dates),
+    )
+
+    set_price_events: Dict[Tuple[Asset, date], SetPrice] = {}
+    for dte, quotes in lookup_prices_for_dates(stale, stale_dates, events_file).items():
+        for asset, quote in quotes.items():
+            if dte in stale[asset] and (asset, quote.date) not in set_price_events:
+                set_price_events[(asset, quote.date)] = SetPrice(
+                    asset=asset,
+                    date=quote.date,
+                    amount=quote.price,
+                    created_at=datetime.now(timezone.utc),
+                )
+
+    for evt in set_price_events.values():
+        write_event(evt, file_name=events_file)
+
+    return list(set_price_events.values())
+
+
+def lookup_prices(
+    assets: Iterable[Asset], date: date, events_file: str
+) -> Dict[Asset, "Quote"]:
+    # quotes pulls in requests, it is only imported once a price is actually fetched
+    from harvest import quotes
+    from harvest.price_store import open_default_price_store
+
+    with open_default_price_store(events_file) as store:
+        return quotes.lookup_prices(assets, date, store=store)
+
+
+def lookup_prices_for_dates(
+    assets: Iterable[Asset], dates: Sequence[date], events_file: str
+) -> Dict[date, Dict[Asset, "Quote"]]:
+    from harvest import quotes
+    from harvest.price_store import open_default_price_store
+
+    with open_default_price_store(events_file) as store:
+        return quotes.lookup_prices_for_dates(assets, dates, store=store)
+
+
+def generate_set_price_events(
+    assets: Iterable[Asset], date: date, events_file: str
+) -> List[SetPrice]:
     events = []
-    for asset, quote in lookup_prices(assets, date).items():
+    for asset, quote in lookup_prices(assets, date, events_file).items():
         events.append(
             SetPrice(
                 asset=asset,
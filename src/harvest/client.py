@@ -0,0 +1,43 @@
+from datetime import date
+import json
+import sys
+from typing import Sequence
+from harvest.events import RunReport, parse_event
+
+# set to the server's url (http://127.0.0.1:8765) to run main.py as a client of it
+SERVER_ENV = "HARVEST_SERVER"
+INCOMPLETE_SYMBOLS_HEADER = "X-Incomplete-Symbols"
+
+
+def send_event(server_url: str, cmd: str, dte: date, args: Sequence[str]) -> None:
+    # the event is handled by a running server, only reports are written locally
+    import urllib.request  # only imported when running as a client
+
+    event = parse_event(cmd, dte, *args)
+    body = json.dumps({"event": cmd, "date": str(dte), "args": list(args)})
+    request = urllib.request.Request(
+        f"{server_url}/events",
+        data=body.encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+    with urllib.request.urlopen(request) as response:
+        if not isinstance(event, RunReport):
+            return
+
+        csv = response.read().decode()
+        incomplete_symbols = response.headers.get(INCOMPLETE_SYMBOLS_HEADER)
+
+    if event.output == "-":
+        sys.stdout.write(csv)
+    else:
+        with open(event.output, "w", newline="") as file:
+            file.write(csv)
+
+    print(
+        "Report written to file: {} (incomplete symbols: {})".format(
+            event.output, incomplete_symbols or "none"
+        ),
+        file=sys.stderr if event.output == "-" else sys.stdout,
+    )
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+import json
+import logging
+import os
+import shutil
+from typing import Any, Dict, List, Tuple
+from harvest.event_log import complete_size, iter_event_lines
+from harvest.events import (
+    Event,
+    FileWritten,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+    SetTargetAllocation,
+    UnknownEvent,
+    parse_event_json,
+)
+from harvest.snapshots import snapshot_dir
+
+logger = logging.getLogger(__name__)
+
+CompactionKey = Tuple[Any, ...]
+
+# marks lines that are dropped regardless of what follows them
+DROP = ()
+
+
+@dataclass(frozen=True)
+class CompactionResult:
+    kept: int
+    dropped: int
+
+
+def compaction_key(event: Event) -> CompactionKey | None:
+    # a report replaces the current event with any later one on the same key and date,
+    # so of those only the last one in the log can ever be observed
+    match event:
+        case SetBalance(account=account, asset=asset, date=dte):
+            return SetBalance, account, asset, dte
+        case SetPrice(asset=asset, date=dte):
+            return SetPrice, asset, dte
+        case SetAllocation(asset=asset, date=dte):
+            return SetAllocation, asset, dte
+        case SetTargetAllocation(date=dte):
+            return SetTargetAllocation, dte
+        case UnknownEvent(event=data) if is_file_written(data):
+            return DROP
+        case _:
+            return None
+
+
+def is_file_written(data: str) -> bool:
+    # report notifications were appended to older logs, they are never read back
+    return json.loads(data).get("type") == FileWritten.__name__
+
+
+def compact_log(events_file: str) -> CompactionResult:
+    # the log should not be appended to while it is compacted, events appended after the
+    # tail is copied are lost
+    end = complete_size(events_file)
+    keys: List[CompactionKey | None] = []
+    last: Dict[CompactionKey, int] = {}
+    for idx, line in enumerate(iter_event_lines(events_file, end=end)):
+        key = compaction_key(parse_event_json(line))
+        keys.append(key)
+        if key:
+            last[key] = idx
+
+    tmp_path = f"{events_file}.compact.tmp"
+    kept = 0
+    with open(tmp_path, "wb") as output:
+        # kept lines are copied verbatim, in their original order
+        for idx, line in enumerate(iter_event_lines(events_file, end=end)):
+            key = keys[idx]
+            if key is None or (key and last[key] == idx):
+                output.write(line)
+                output.write(b"\n")
+                kept += 1
+
+        with open(events_file, "rb") as file:
+            file.seek(end)
+            shutil.copyfileobj(file, output)
+
+        output.flush()
+        os.fsync(output.fileno())
+
+    # snapshots refer to byte offsets in the old log, they are removed before the log is
+    # replaced so a crash in between leaves the old log without stale snapshots
+    shutil.rmtree(snapshot_dir(events_file), ignore_errors=True)
+    os.replace(tmp_path, events_file)
+    fsync_dir(os.path.dirname(os.path.abspath(events_file)))
+
+    result = CompactionResult(kept=kept, dropped=len(keys) - kept)
+    logger.debug("Compacted %s, kept %i dropped %i", events_file, kept, result.dropped)
+    return result
+
+
+def fsync_dir(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,210 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import itertools
+import mmap
+import os
+import time
+from typing import Any, Callable, Iterator, List, Self, Tuple, TypeVar
+from harvest.events import (
+    Event,
+    EventPrefilter,
+    JsonEventFilter,
+    parse_event_json,
+    parse_matching_event_json,
+    to_event_json,
+)
+
+DEFAULT_FLUSH_EVERY = 1000
+DEFAULT_FLUSH_INTERVAL = 0.5
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# number of processes parsing the log in parallel, unset or below 2 parses it in-process
+PARSE_WORKERS_ENV = "HARVEST_PARSE_WORKERS"
+# smaller logs are parsed in-process, starting the workers would cost more than it saves
+MIN_PARALLEL_SIZE = 8 * 1024 * 1024
+# more chunks than workers, so a worker that finishes early picks up another one
+CHUNKS_PER_WORKER = 4
+
+T = TypeVar("T")
+
+
+def complete_size(file_name: str) -> int:
+    # size of the file up to and including the last newline, excluding a trailing
+    # partially written line
+    with open(file_name, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return 0
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.rfind(b"\n") + 1
+
+
+def iter_event_lines(
+    file_name: str, offset: int = 0, end: int | None = None
+) -> Iterator[bytes]:
+    with open(file_name, "rb") as file:
+        if os.fstat(file.fileno()).st_size <= offset:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm) if end is None else min(end, len(mm))
+            pos = offset
+            while pos < end:
+                newline = mm.find(b"\n", pos, end)
+                next_pos = end if newline == -1 else newline + 1
+                line = mm[pos:next_pos].strip()
+                pos = next_pos
+                if line:
+                    yield line
+
+
+def iter_events(
+    file_name: str,
+    offset: int = 0,
+    end: int | None = None,
+    prefilter: JsonEventFilter | None = None,
+) -> Iterator[Event]:
+    # events are parsed lazily from a memory-mapped file, so only the event currently
+    # being consumed needs to be held in memory
+    lines = iter_event_lines(file_name, offset, end)
+    if prefilter is None:
+        return map(parse_event_json, lines)
+
+    # only the events that pass the prefilter are fully decoded
+    events = (parse_matching_event_json(line, prefilter) for line in lines)
+    return (evt for evt in events if evt is not None)
+
+
+def parallel_workers(file_name: str) -> int:
+    workers = int(os.getenv(PARSE_WORKERS_ENV) or 0)
+    if workers < 2 or os.path.getsize(file_name) < MIN_PARALLEL_SIZE:
+        return 0
+
+    return workers
+
+
+def split_ranges(
+    file_name: str, parts: int, end: int | None = None
+) -> List[Tuple[int, int]]:
+    # byte ranges of about equal size, each ending on a newline
+    with open(file_name, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if end == 0:
+            return []
+
+        ranges = []
+        start = 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(1, parts):
+                newline = mm.find(b"\n", max(start, end * i // parts), end)
+                if newline == -1:
+                    break
+                ranges.append((start, newline + 1))
+                start = newline + 1
+
+        if start < end:
+            ranges.append((start, end))
+
+        return ranges
+
+
+def parse_range(
+    file_name: str, start: int, end: int, prefilter: EventPrefilter | None = None
+) -> List[Event]:
+    return list(iter_events(file_name, start, end, prefilter))
+
+
+def map_ranges(
+    fn: Callable[[str, int, int], T],
+    file_name: str,
+    workers: int,
+    end: int | None = None,
+) -> List[T]:
+    # fn is called on each range in a worker process, results are in log order, a
+    # trailing line still being written is left out as with the sequential reads
+    end = complete_size(file_name) if end is None else end
+    ranges = split_ranges(file_name, workers * CHUNKS_PER_WORKER, end)
+    if not ranges:
+        return []
+
+    starts, ends = zip(*ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fn, itertools.repeat(file_name), starts, ends))
+
+
+def read_events_parallel(
+    file_name: str, workers: int, prefilter: EventPrefilter | None = None
+) -> List[Event]:
+    chunks = map_ranges(partial(parse_range, prefilter=prefilter), file_name, workers)
+    return list(itertools.chain.from_iterable(chunks))
+
+
+class BatchedEventWriter(ABC):
+    # buffers events and writes them as a single batch once flush_every events are
+    # pending or flush_interval seconds have passed since the last flush (checked on
+    # each write), and when the writer is closed
+    def __init__(
+        self,
+        file_name: str,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        fsync: bool = False,
+    ):
+        self.file_name = file_name
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.pending: List[Event] = []
+        self.written = 0
+        self.last_flush = time.monotonic()
+
+    def __enter__(self) -> Self:
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def write(self, event: Event) -> None:
+        self.pending.append(event)
+        if (
+            len(self.pending) >= self.flush_every
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            self.write_batch(self.pending)
+            self.written += len(self.pending)
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+    @abstractmethod
+    def open(self) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def write_batch(self, events: List[Event]) -> None:
+        pass
+
+
+class EventWriter(BatchedEventWriter):
+    def open(self) -> None:
+        self.file = open(self.file_name, "a", buffering=WRITE_BUFFER_SIZE)
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    def write_batch(self, events: List[Event]) -> None:
+        self.file.write("".join(f"{to_event_json(evt)}\n" for evt in events))
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
@@ -1,29 +1,24 @@
 from dataclasses import dataclass
-from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from datetime import date, datetime
 from decimal import Decimal
 from json import JSONEncoder
 import json
-import numbers
-from os import access
-from re import sub
-from sqlite3 import Time
+import sys
 from typing import (
     Any,
     Callable,
     Dict,
-    List,
     Literal,
     Set,
     Generator,
-    Self,
     TypeVar,
     cast,
     SupportsFloat,
+    Tuple,
+    get_args,
 )
 
-from attr import attr
-from pyparsing import identbodychars
-
 
 def each_slice(value: str, size: int = 3) -> Generator[str, None, None]:
     for i in range(0, len(value), size):
@@ -33,54 +28,98 @@ def each_slice(value: str, size: int = 3) -> Generator[str, None, None]:
 TMoney = TypeVar("TMoney", bound="Money")
 
 
+MONEY_SCALE = 1_000_000
+
+
+def div_round(numerator: int, denominator: int) -> int:
+    # integer division rounding half to even, like Decimal's default rounding
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+def to_ratio(value: SupportsFloat) -> Tuple[int, int]:
+    if isinstance(value, int):
+        return value, 1
+    elif isinstance(value, Decimal):
+        return value.as_integer_ratio()
+    else:
+        # go through the shortest repr so 0.1 is 1/10 rather than its binary expansion
+        return Decimal(repr(float(value))).as_integer_ratio()
+
+
+def is_number(value: object) -> bool:
+    # checking the concrete types first avoids the much slower runtime protocol check
+    return isinstance(value, (Decimal, int, float)) or isinstance(value, SupportsFloat)
+
+
 class Money:
+    # a fixed-point amount stored as an integer number of millionths, so arithmetic is
+    # exact integer arithmetic rather than Decimal or float arithmetic
+    __slots__ = ("units",)
+
     def __init__(self, amount: Decimal):
-        self.amount = amount
+        numerator, denominator = to_ratio(amount)
+        self.units = div_round(numerator * MONEY_SCALE, denominator)
+
+    @classmethod
+    def from_units(cls, units: int) -> "Money":
+        money = cls.__new__(cls)
+        money.units = units
+        return money
+
+    @property
+    def amount(self) -> Decimal:
+        return Decimal(self.units).scaleb(-6)
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Money):
-            return self.amount == other.amount
+            return self.units == other.units
         else:
             return self.amount == other
 
     def __repr__(self) -> str:
-        sign = "" if abs(self.amount) == self.amount else "-"
-        rounded = str(round(abs(self.amount), 2))
-        dollars, cents = rounded.split(".")
-
-        output = list(reversed(cents))
-        output.append(".")
-        for i, ch in enumerate(reversed(dollars)):
-            if i != 0 and i % 3 == 0:
-                output.append(",")
-            output.append(ch)
+        sign = "-" if self.units < 0 else ""
+        dollars, cents = divmod(div_round(abs(self.units), MONEY_SCALE // 100), 100)
 
-        output.append(sign)
-
-        return "".join(reversed(output))
+        return f"{sign}{dollars:,}.{cents:02d}"
 
     def __add__(self, other: TMoney | SupportsFloat) -> TMoney:
         if isinstance(other, Money):
             # cast() is a work-around for a mypy issue: https://github.com/python/mypy/issues/12800
-            return cast(TMoney, Money(self.amount + other.amount))
-        elif isinstance(other, SupportsFloat):
-            return cast(TMoney, Money(self.amount + Decimal(float(other))))
+            return cast(TMoney, Money.from_units(self.units + other.units))
+        elif is_number(other):
+            return cast(TMoney, Money.from_units(self.units + Money(other).units))
         else:
             raise ValueError("Attempting to add {} to Money".format(type(other)))
 
+    def __sub__(self, other: TMoney | SupportsFloat) -> TMoney:
+        if isinstance(other, Money):
+            return cast(TMoney, Money.from_units(self.units - other.units))
+        elif is_number(other):
+            return cast(TMoney, Money.from_units(self.units - Money(other).units))
+        else:
+            raise ValueError("Attempting to subtract {} from Money".format(type(other)))
+
     def __mul__(self, other: TMoney | SupportsFloat) -> TMoney:
         if isinstance(other, Money):
-            return cast(TMoney, Money(self.amount * other.amount))
-        elif isinstance(other, SupportsFloat):
-            return cast(TMoney, Money(self.amount * Decimal(float(other))))
+            units = div_round(self.units * other.units, MONEY_SCALE)
+            return cast(TMoney, Money.from_units(units))
+        elif is_number(other):
+            numerator, denominator = to_ratio(other)
+            units = div_round(self.units * numerator, denominator)
+            return cast(TMoney, Money.from_units(units))
         else:
             raise ValueError("Attempting to multiply {} and Money".format(type(other)))
 
     def __truediv__(self, other: TMoney | SupportsFloat) -> Decimal:
         if isinstance(other, Money):
-            return self.amount / other.amount
-        elif isinstance(other, SupportsFloat):
-            return self.amount / Decimal(float(other))
+            return Decimal(self.units) / Decimal(other.units)
+        elif is_number(other):
+            numerator, denominator = to_ratio(other)
+            return self.amount * denominator / numerator
         else:
             raise ValueError("Attempting to divide Money by {}".format(type(other)))
 
@@ -89,18 +128,57 @@ AssetType = Literal["investment", "cash"]
 TAsset = TypeVar("TAsset", bound="Asset")
 
 
-@dataclass(eq=True, frozen=True)
+@dataclass(eq=False, frozen=True)
 class Asset:
     identifier: str
     type: AssetType
 
+    def __post_init__(self) -> None:
+        # assets are hashed for every (account, asset) lookup, so the hash is only
+        # computed once
+        object.__setattr__(self, "_hash", hash((self.identifier, self.type)))
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        elif isinstance(other, Asset):
+            return self.identifier == other.identifier and self.type == other.type
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return self._hash  # type: ignore[attr-defined]
+
+    def __reduce__(self) -> Tuple[Callable[..., "Asset"], Tuple[str, AssetType]]:
+        return (intern_asset, (self.identifier, self.type))
+
     @classmethod
     def for_symbol(cls: TAsset, symbol: str) -> TAsset:
-        return cast(TAsset, Asset(identifier=symbol, type="investment"))
+        return cast(TAsset, intern_asset(identifier=symbol, type="investment"))
 
     @classmethod
     def cash(cls: TAsset, identifier: str = "cash") -> TAsset:
-        return cast(TAsset, Asset(identifier=identifier, type="cash"))
+        return cast(TAsset, intern_asset(identifier=identifier, type="cash"))
+
+
+# a log has only a few dozen distinct assets, accounts and allocations repeated across
+# every event, so equal values share a single instance
+_assets: Dict[Tuple[str, str], Asset] = {}
+_allocations: Dict[Tuple[Any, ...], "Allocation"] = {}
+
+
+def intern_asset(identifier: str, type: AssetType) -> Asset:
+    asset = _assets.get((identifier, type))
+    if asset is None:
+        asset = _assets.setdefault(
+            (identifier, type), Asset(identifier=sys.intern(identifier), type=type)
+        )
+
+    return asset
+
+
+def intern_account(account: str) -> str:
+    return sys.intern(account)
 
 
 @dataclass(frozen=True)
@@ -125,7 +203,8 @@ class SetPrice:
     created_at: datetime
 
 
-@dataclass
+# frozen since parsed allocations are interned and shared between events
+@dataclass(frozen=True)
 class Allocation:
     stock_large: Decimal
     stock_mid_small: Decimal
@@ -144,7 +223,7 @@ class Allocation:
         return self.bond_us + self.bond_intl
 
     def __post_init__(self) -> None:
-        self.other = 100 - (self.stock + self.bond + self.cash)
+        object.__setattr__(self, "other", 100 - (self.stock + self.bond + self.cash))
 
     def subtotals(self, total: Money) -> Dict[str, Money]:
         subtotals: Dict[str, Money] = {}
@@ -180,6 +259,34 @@ class SetAllocation:
 class RunReport:
     date: date
     account: str | None = None
+    # a file path, or "-" for stdout
+    output: str = "harvest.csv"
+
+
+ReportFrequency = Literal["daily", "weekly", "monthly", "quarterly", "yearly"]
+ReportLayout = Literal["long", "files"]
+
+
+@dataclass(frozen=True)
+class RunReportSeries:
+    start: date
+    end: date
+    frequency: ReportFrequency = "monthly"
+    account: str | None = None
+    # "long" writes every report date to a single file, "files" writes a file per date
+    layout: ReportLayout = "long"
+
+    def __post_init__(self) -> None:
+        if self.frequency not in get_args(ReportFrequency):
+            raise ValueError(f"Unknown report frequency: {self.frequency}")
+        if self.layout not in get_args(ReportLayout):
+            raise ValueError(f"Unknown report layout: {self.layout}")
+
+
+@dataclass(frozen=True)
+class WatchReport:
+    date: date
+    account: str | None = None
 
 
 @dataclass(frozen=True)
@@ -196,6 +303,8 @@ Event = (
     | SetAllocation
     | SetTargetAllocation
     | RunReport
+    | RunReportSeries
+    | WatchReport
     | FileWritten
 )
 
@@ -229,7 +338,7 @@ class EventEncoder(JSONEncoder):
         elif isinstance(obj, Allocation):
             return obj.__dict__
         elif isinstance(obj, Asset):
-            return obj.__dict__
+            return {"identifier": obj.identifier, "type": obj.type}
         elif isinstance(obj, date):
             return obj.isoformat()
         elif isinstance(obj, Decimal):
@@ -238,50 +347,198 @@ class EventEncoder(JSONEncoder):
         return JSONEncoder.default(self, obj)
 
 
-def parse_event_json(data: str) -> Event:
-    evt = json.loads(data)
-    dte = date.fromisoformat(evt["date"])
-
-    if evt["type"] == "SetBalance":
-        return parse_event(
-            "set_balance",
-            dte,
-            evt["account"],
-            evt["asset"],
-            evt["amount"],
-            evt["created_at"],
-        )
-    elif evt["type"] == "SetPrice":
-        return parse_event(
-            "set_price", dte, evt["asset"], evt["amount"], evt["created_at"]
-        )
-    elif evt["type"] == "SetAllocation":
-        return parse_event(
-            "set_allocation",
-            dte,
-            evt["asset"],
-            evt["allocation"]["stock_large"],
-            evt["allocation"]["stock_mid_small"],
-            evt["allocation"]["stock_intl"],
-            evt["allocation"]["bond_us"],
-            evt["allocation"]["bond_intl"],
-            evt["allocation"]["cash"],
-            evt["created_at"],
-        )
-    elif evt["type"] == "SetTargetAllocation":
-        return parse_event(
-            "set_target_allocation",
-            dte,
-            evt["allocation"]["stock_large"],
-            evt["allocation"]["stock_mid_small"],
-            evt["allocation"]["stock_intl"],
-            evt["allocation"]["bond_us"],
-            evt["allocation"]["bond_intl"],
-            evt["allocation"]["cash"],
-            evt["created_at"],
+ALLOCATION_FIELDS = (
+    "stock_large",
+    "stock_mid_small",
+    "stock_intl",
+    "bond_us",
+    "bond_intl",
+    "cash",
+)
+
+
+def to_iso(value: date | str) -> str:
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def to_decimal_str(value: Decimal | str) -> str:
+    return value.to_eng_string() if isinstance(value, Decimal) else str(value)
+
+
+def serialize_asset(asset: Asset) -> Dict[str, Any]:
+    return {"identifier": asset.identifier, "type": asset.type}
+
+
+def serialize_allocation(allocation: Allocation) -> Dict[str, Any]:
+    return {
+        field: to_decimal_str(getattr(allocation, field))
+        for field in ALLOCATION_FIELDS + ("other",)
+    }
+
+
+def serialize_set_balance(event: SetBalance) -> Dict[str, Any]:
+    return {
+        "account": event.account,
+        "asset": serialize_asset(event.asset),
+        "date": to_iso(event.date),
+        "amount": to_decimal_str(event.amount),
+        "created_at": to_iso(event.created_at),
+        "type": "SetBalance",
+    }
+
+
+def serialize_set_price(event: SetPrice) -> Dict[str, Any]:
+    return {
+        "asset": serialize_asset(event.asset),
+        "date": to_iso(event.date),
+        "amount": to_decimal_str(event.amount),
+        "created_at": to_iso(event.created_at),
+        "type": "SetPrice",
+    }
+
+
+def serialize_set_allocation(event: SetAllocation) -> Dict[str, Any]:
+    return {
+        "asset": serialize_asset(event.asset),
+        "date": to_iso(event.date),
+        "allocation": serialize_allocation(event.allocation),
+        "created_at": to_iso(event.created_at),
+        "type": "SetAllocation",
+    }
+
+
+def serialize_set_target_allocation(event: SetTargetAllocation) -> Dict[str, Any]:
+    return {
+        "date": to_iso(event.date),
+        "allocation": serialize_allocation(event.allocation),
+        "created_at": to_iso(event.created_at),
+        "type": "SetTargetAllocation",
+    }
+
+
+EVENT_SERIALIZERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {
+    SetBalance: serialize_set_balance,
+    SetPrice: serialize_set_price,
+    SetAllocation: serialize_set_allocation,
+    SetTargetAllocation: serialize_set_target_allocation,
+}
+
+
+def to_event_json(event: Event) -> str:
+    # serializes to plain dicts up front so json.dumps never has to fall back to the
+    # EventEncoder hook for the common event types
+    if serializer := EVENT_SERIALIZERS.get(type(event)):
+        return json.dumps(serializer(event))
+
+    return json.dumps(
+        {**event.__dict__, "type": type(event).__name__}, cls=EventEncoder
+    )
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> date:
+    # dates repeat heavily across events, so each distinct string is only parsed once
+    return date.fromisoformat(value)
+
+
+def parse_allocation(allocation: Dict[str, Any]) -> Allocation:
+    key = tuple(allocation[field] for field in ALLOCATION_FIELDS)
+    if (interned := _allocations.get(key)) is None:
+        interned = _allocations.setdefault(
+            key, Allocation(*(Decimal(value) for value in key))
         )
-    else:
-        return UnknownEvent(event=data)
+
+    return interned
+
+
+def parse_set_balance(evt: Dict[str, Any]) -> SetBalance:
+    return SetBalance(
+        account=intern_account(evt["account"]),
+        asset=parse_asset(evt["asset"]),
+        date=parse_date(evt["date"]),
+        amount=Decimal(evt["amount"]),
+        created_at=datetime.fromisoformat(evt["created_at"]),
+    )
+
+
+def parse_set_price(evt: Dict[str, Any]) -> SetPrice:
+    return SetPrice(
+        asset=parse_asset(evt["asset"]),
+        date=parse_date(evt["date"]),
+        amount=Decimal(evt["amount"]),
+        created_at=datetime.fromisoformat(evt["created_at"]),
+    )
+
+
+def parse_set_allocation(evt: Dict[str, Any]) -> SetAllocation:
+    return SetAllocation(
+        asset=parse_asset(evt["asset"]),
+        date=parse_date(evt["date"]),
+        allocation=parse_allocation(evt["allocation"]),
+        created_at=datetime.fromisoformat(evt["created_at"]),
+    )
+
+
+def parse_set_target_allocation(evt: Dict[str, Any]) -> SetTargetAllocation:
+    return SetTargetAllocation(
+        date=parse_date(evt["date"]),
+        allocation=parse_allocation(evt["allocation"]),
+        created_at=datetime.fromisoformat(evt["created_at"]),
+    )
+
+
+EVENT_PARSERS: Dict[str, Callable[[Dict[str, Any]], Event]] = {
+    "SetBalance": parse_set_balance,
+    "SetPrice": parse_set_price,
+    "SetAllocation": parse_set_allocation,
+    "SetTargetAllocation": parse_set_target_allocation,
+}
+
+
+def parse_event_json(data: str | bytes) -> Event:
+    evt = json.loads(data)
+    if parser := EVENT_PARSERS.get(evt.get("type")):
+        return parser(evt)
+
+    return UnknownEvent(event=data if isinstance(data, str) else data.decode())
+
+
+# the types of the events a report is built from
+REPORT_EVENT_TYPES = frozenset(
+    {"SetBalance", "SetPrice", "SetAllocation", "SetTargetAllocation"}
+)
+JsonEventFilter = Callable[[Dict[str, Any]], bool]
+
+
+@dataclass(frozen=True)
+class EventPrefilter:
+    # the conditions of event_matcher, checked against the decoded JSON before any
+    # Decimal, datetime or Allocation is built (ISO dates compare correctly as strings)
+    target_date: str
+    target_account: str | None = None
+
+    @classmethod
+    def for_report(
+        cls, target_date: date, target_account: str | None = None
+    ) -> "EventPrefilter":
+        return cls(target_date=str(target_date), target_account=target_account)
+
+    def __call__(self, evt: Dict[str, Any]) -> bool:
+        match evt.get("type"):
+            case "SetBalance":
+                matches_account = self.target_account in (None, evt["account"])
+                return evt["date"] <= self.target_date and matches_account
+            case "SetPrice" | "SetAllocation" | "SetTargetAllocation":
+                return evt["date"] <= self.target_date
+            case _:
+                return False
+
+
+def parse_matching_event_json(
+    data: str | bytes, prefilter: JsonEventFilter
+) -> Event | None:
+    evt = json.loads(data)
+    return EVENT_PARSERS[evt["type"]](evt) if prefilter(evt) else None
 
 
 def parse_event(evt: str, date: date, *rest: Any) -> Event:
@@ -329,14 +586,26 @@ def parse_event(evt: str, date: date, *rest: Any) -> Event:
             ),
             created_at=datetime.fromisoformat(rest[6]),
         )
-    elif evt == "run_report":
+    elif evt in ("run_report", "watch_report"):
         kwargs = {"date": date}
         if len(rest) > 0:
-            kwargs["account"] = rest[0]
-        event = RunReport(**kwargs)
+            kwargs["account"] = rest[0] or None
+        if len(rest) > 1 and evt == "run_report":
+            kwargs["output"] = rest[1]
+        event = RunReport(**kwargs) if evt == "run_report" else WatchReport(**kwargs)
+    elif evt == "run_report_series" and len(rest) > 0:
+        kwargs = {"start": date, "end": datetime.fromisoformat(rest[0]).date()}
+        for name, value in zip(("frequency", "account", "layout"), rest[1:]):
+            # an empty account skips to the layout, as with run_report's output
+            kwargs[name] = (value or None) if name == "account" else value
+        event = RunReportSeries(**kwargs)
 
     return event
 
 
-def parse_asset(asset: Dict[str, Any]) -> Asset:
-    return Asset(identifier=asset["identifier"], type=asset["type"])
+def parse_asset(asset: Dict[str, Any] | str) -> Asset:
+    # a bare symbol, as passed on the command line, is an investment
+    if isinstance(asset, str):
+        return Asset.for_symbol(asset)
+
+    return intern_asset(identifier=asset["identifier"], type=asset["type"])
@@ -0,0 +1,89 @@
+import csv
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, Set, Tuple
+from harvest.actions import open_event_writer, read_events
+from harvest.events import Asset, Event, SetBalance, SetPrice, parse_date, parse_event
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 10000
+CASH_SYMBOLS = frozenset(("FCASH", "CASH", "FDRXX"))
+
+ImportKey = Tuple[type, str | None, Asset, date, Decimal]
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    imported: int
+    skipped: int
+
+
+def to_asset(symbol: str) -> Dict[str, Any]:
+    return {
+        "identifier": symbol,
+        "type": "cash" if symbol in CASH_SYMBOLS else "investment",
+    }
+
+
+def parse_row(row: Dict[str, str], created_at: str) -> Event:
+    # rows with an account are positions, rows without one are prices
+    dte = parse_date(row["date"])
+    asset = to_asset(row["symbol"])
+    if account := row.get("account"):
+        return parse_event(
+            "set_balance", dte, account, asset, row["amount"], created_at
+        )
+    else:
+        amount = row.get("price") or row["amount"]
+        return parse_event("set_price", dte, asset, amount, created_at)
+
+
+def parse_csv(file_name: str, created_at: str) -> Iterator[Event]:
+    with open(file_name, newline="") as file:
+        reader = csv.DictReader(file)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        for row in reader:
+            yield parse_row(row, created_at)
+
+
+def import_key(event: Event) -> ImportKey | None:
+    match event:
+        case SetBalance(account=account, asset=asset, date=dte, amount=amount):
+            return SetBalance, account, asset, dte, amount
+        case SetPrice(asset=asset, date=dte, amount=amount):
+            return SetPrice, None, asset, dte, amount
+        case _:
+            return None
+
+
+def import_csv(
+    input_paths: Iterable[str],
+    events_file: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportResult:
+    # records the log already contains are skipped, so re-importing an overlapping
+    # export only appends what is new
+    existing = read_events(events_file) if os.path.exists(events_file) else []
+    seen: Set[ImportKey | None] = {import_key(evt) for evt in existing}
+    created_at = datetime.now(timezone.utc).isoformat()
+    imported = skipped = 0
+
+    with open_event_writer(
+        events_file, flush_every=batch_size, flush_interval=float("inf")
+    ) as writer:
+        for input_path in input_paths:
+            for evt in parse_csv(input_path, created_at):
+                if (key := import_key(evt)) is None or key in seen:
+                    skipped += 1
+                    continue
+
+                seen.add(key)
+                writer.write(evt)
+                imported += 1
+
+    logger.debug("Imported %i events, skipped %i", imported, skipped)
+    return ImportResult(imported=imported, skipped=skipped)
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# set to a file path (or "-" for stderr) to write a JSON summary of a run there
+INSTRUMENTATION_ENV = "HARVEST_INSTRUMENTATION"
+
+T = TypeVar("T")
+
+
+@dataclass
+class PhaseTiming:
+    wall: float = 0.0
+    # process-wide, so includes work done on other threads during the phase
+    cpu: float = 0.0
+    calls: int = 0
+
+
+@dataclass(frozen=True)
+class HttpCall:
+    url: str
+    status: int
+    latency: float
+
+
+@dataclass
+class Instrumentation:
+    phases: Dict[str, PhaseTiming] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    http_calls: List[HttpCall] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            with self.lock:
+                timing = self.phases.setdefault(name, PhaseTiming())
+                timing.wall += time.perf_counter() - wall
+                timing.cpu += time.process_time() - cpu
+                timing.calls += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += n
+
+    def record_http(self, url: str, status: int, latency: float) -> None:
+        with self.lock:
+            self.http_calls.append(HttpCall(url=url, status=status, latency=latency))
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = [call.latency for call in self.http_calls]
+        return {
+            "phases": {name: asdict(timing) for name, timing in self.phases.items()},
+            "counters": dict(self.counters),
+            "http": {
+                "calls": len(self.http_calls),
+                "total_latency": sum(latencies),
+                "max_latency": max(latencies, default=0.0),
+                "requests": [asdict(call) for call in self.http_calls],
+            },
+        }
+
+
+# instrumentation is opt-in, every helper below is a no-op unless it is enabled
+_active: Instrumentation | None = None
+
+
+def enable() -> Instrumentation:
+    global _active
+    _active = Instrumentation()
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+def phase(name: str) -> ContextManager[None]:
+    return _active.phase(name) if _active else nullcontext()
+
+
+def count(name: str, n: int = 1) -> None:
+    if _active:
+        _active.count(name, n)
+
+
+def counted(name: str, items: Iterable[T]) -> Iterable[T]:
+    if not _active:
+        return items
+
+    def counting(instrumentation: Instrumentation) -> Iterator[T]:
+        n = 0
+        try:
+            for item in items:
+                n += 1
+                yield item
+        finally:
+            instrumentation.count(name, n)
+
+    return counting(_active)
+
+
+def record_http(url: str, status: int, latency: float) -> None:
+    if _active:
+        _active.record_http(url, status, latency)
+
+
+def emit(destination: str) -> Dict[str, Any]:
+    summary = _active.summary() if _active else {}
+    output = json.dumps(summary, indent=2)
+    logger.info("Instrumentation summary: %s", json.dumps(summary))
+
+    if destination == "-":
+        print(output, file=sys.stderr)
+    else:
+        with open(destination, "w") as file:
+            file.write(output)
+            file.write("\n")
+
+    return summary
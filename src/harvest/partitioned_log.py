@@ -0,0 +1,168 @@
+from dataclasses import asdict, dataclass, field
+from datetime import date
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List
+from urllib.parse import quote
+from harvest.event_log import BatchedEventWriter, complete_size, iter_events
+from harvest.events import Event, EventPrefilter, SetBalance, to_event_json
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_EXTENSION = ".partitioned"
+MANIFEST_FILE = "manifest.json"
+# segment of the events that aren't tied to an account, when partitioning by account
+SHARED_SEGMENT = "shared"
+# segment of the events without a date
+UNDATED_SEGMENT = "undated"
+
+
+@dataclass
+class Segment:
+    path: str
+    min_date: str | None = None
+    max_date: str | None = None
+    account: str | None = None
+    count: int = 0
+
+    def update(self, event: Event) -> None:
+        if dte := getattr(event, "date", None):
+            self.min_date = min(self.min_date or str(dte), str(dte))
+            self.max_date = max(self.max_date or str(dte), str(dte))
+        self.count += 1
+
+    def may_match(self, target_date: date, target_account: str | None) -> bool:
+        # no event of a segment can match a report before its first date, nor one for
+        # another account
+        if self.min_date is None or self.min_date > str(target_date):
+            return False
+        return target_account is None or self.account in (None, target_account)
+
+
+@dataclass
+class Manifest:
+    by_account: bool = False
+    segments: Dict[str, Segment] = field(default_factory=dict)
+
+    def segment_for(self, event: Event) -> Segment:
+        # one segment per year, and per account if partitioned by account
+        dte = getattr(event, "date", None)
+        account = None
+        name = str(dte.year) if dte else UNDATED_SEGMENT
+        if self.by_account and dte:
+            account = event.account if isinstance(event, SetBalance) else None
+            name = os.path.join(name, segment_name(account))
+
+        if (segment := self.segments.get(name)) is None:
+            segment = Segment(path=f"{name}.jsonl", account=account)
+            self.segments[name] = segment
+
+        return segment
+
+
+def segment_name(account: str | None) -> str:
+    if account is None:
+        return SHARED_SEGMENT
+
+    # percent-encoded so every account gets its own segment and a valid file name
+    return "account-" + quote(account, safe="")
+
+
+def is_partitioned_log(file_name: str) -> bool:
+    return file_name.endswith(PARTITIONED_EXTENSION)
+
+
+def read_manifest(directory: str, by_account: bool = False) -> Manifest:
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return Manifest(by_account=by_account)
+
+    with open(path) as file:
+        data = json.load(file)
+
+    segments = {name: Segment(**segment) for name, segment in data["segments"].items()}
+    return Manifest(by_account=data["by_account"], segments=segments)
+
+
+def write_manifest(directory: str, manifest: Manifest) -> None:
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(
+            {
+                "by_account": manifest.by_account,
+                "segments": {
+                    name: asdict(segment)
+                    for name, segment in sorted(manifest.segments.items())
+                },
+            },
+            file,
+            indent=2,
+        )
+    os.replace(tmp_path, path)
+
+
+def read_events(
+    directory: str, target_date: date | None = None, target_account: str | None = None
+) -> Iterator[Event]:
+    # only the segments that could hold an event matching the report are opened, events
+    # are in log order within a segment, which is all a report relies on
+    manifest = read_manifest(directory)
+    prefilter = (
+        EventPrefilter.for_report(target_date, target_account) if target_date else None
+    )
+    for _, segment in sorted(manifest.segments.items()):
+        if target_date and not segment.may_match(target_date, target_account):
+            continue
+
+        path = os.path.join(directory, segment.path)
+        if os.path.exists(path):
+            yield from iter_events(path, end=complete_size(path), prefilter=prefilter)
+
+
+class PartitionedEventWriter(BatchedEventWriter):
+    def __init__(self, file_name: str, by_account: bool = False, **kwargs: Any):
+        super().__init__(file_name, **kwargs)
+        self.by_account = by_account
+
+    def open(self) -> None:
+        os.makedirs(self.file_name, exist_ok=True)
+
+    def close(self) -> None:
+        self.flush()
+
+    def write_batch(self, events: List[Event]) -> None:
+        # new segments are created as events for a new year (or account) arrive, they
+        # are added to the manifest before being appended to so a crash in between
+        # can't leave events in a segment readers don't know about
+        self.manifest = read_manifest(self.file_name, by_account=self.by_account)
+        by_segment: Dict[str, List[Event]] = {}
+        for evt in events:
+            segment = self.manifest.segment_for(evt)
+            segment.update(evt)
+            by_segment.setdefault(segment.path, []).append(evt)
+        write_manifest(self.file_name, self.manifest)
+
+        for path, segment_events in by_segment.items():
+            path = os.path.join(self.file_name, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as file:
+                file.write("".join(f"{to_event_json(evt)}\n" for evt in segment_events))
+                file.flush()
+                if self.fsync:
+                    os.fsync(file.fileno())
+
+        logger.debug("Appended %i events to %i segments", len(events), len(by_segment))
+
+
+def partition_log(
+    events: Iterable[Event], directory: str, by_account: bool = False
+) -> int:
+    with PartitionedEventWriter(
+        directory, by_account=by_account, flush_every=10000, flush_interval=float("inf")
+    ) as writer:
+        for evt in events:
+            writer.write(evt)
+
+    return writer.written
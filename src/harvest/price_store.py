@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Tuple
+from harvest.events import Asset
+from harvest.quotes import Quote
+
+logger = logging.getLogger(__name__)
+
+# set to the path of the price store, or to an empty string to always fetch quotes,
+# by default it is kept next to the events file
+PRICE_STORE_ENV = "HARVEST_PRICE_STORE"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    symbol TEXT NOT NULL,
+    type TEXT NOT NULL,
+    date TEXT NOT NULL,
+    price TEXT NOT NULL,
+    PRIMARY KEY (symbol, type, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    type TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    PRIMARY KEY (symbol, type, start)
+) WITHOUT ROWID;
+"""
+
+DateRange = Tuple[date, date]
+
+
+def merge_ranges(ranges: Iterable[DateRange]) -> List[DateRange]:
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def missing_ranges(covered: List[DateRange], start: date, end: date) -> List[DateRange]:
+    # the parts of start..end outside of the (merged) covered ranges
+    gaps = []
+    for covered_start, covered_end in covered:
+        if covered_end < start:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > start:
+            gaps.append((start, covered_start - timedelta(days=1)))
+        start = covered_end + timedelta(days=1)
+
+    if start <= end:
+        gaps.append((start, end))
+
+    return gaps
+
+
+class PriceStore:
+    # daily quotes per asset, along with the date ranges already fetched so only the
+    # ranges that were never fetched need to be requested again
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.conn = sqlite3.connect(file_name)
+        self.conn.executescript(SCHEMA)
+        self.cached: Dict[Asset, List[Quote]] = {}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def coverage(self, asset: Asset) -> List[DateRange]:
+        rows = self.conn.execute(
+            "SELECT start, end FROM coverage WHERE symbol = ? AND type = ? ORDER BY start",
+            (asset.identifier, asset.type),
+        )
+        return [
+            (date.fromisoformat(start), date.fromisoformat(end)) for start, end in rows
+        ]
+
+    def gaps(self, asset: Asset, start: date, end: date) -> List[DateRange]:
+        return missing_ranges(self.coverage(asset), start, end)
+
+    def quotes(self, asset: Asset) -> List[Quote]:
+        # sorted by date, so the latest quote as of a date is found by bisection
+        if (quotes := self.cached.get(asset)) is None:
+            rows = self.conn.execute(
+                "SELECT date, price FROM quotes WHERE symbol = ? AND type = ? ORDER BY date",
+                (asset.identifier, asset.type),
+            )
+            quotes = [
+                Quote(date.fromisoformat(dte), Decimal(price)) for dte, price in rows
+            ]
+            self.cached[asset] = quotes
+
+        return quotes
+
+    def add(
+        self, asset: Asset, quotes: Iterable[Quote], start: date, end: date
+    ) -> None:
+        # today's quote can still change, so coverage is only recorded up to yesterday
+        end = min(end, date.today() - timedelta(days=1))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO quotes (symbol, type, date, price) VALUES (?, ?, ?, ?)",
+                (
+                    (asset.identifier, asset.type, str(quote.date), str(quote.price))
+                    for quote in quotes
+                ),
+            )
+            if start <= end:
+                ranges = merge_ranges(self.coverage(asset) + [(start, end)])
+                self.conn.execute(
+                    "DELETE FROM coverage WHERE symbol = ? AND type = ?",
+                    (asset.identifier, asset.type),
+                )
+                self.conn.executemany(
+                    "INSERT INTO coverage (symbol, type, start, end) VALUES (?, ?, ?, ?)",
+                    ((asset.identifier, asset.type, str(s), str(e)) for s, e in ranges),
+                )
+
+        self.cached.pop(asset, None)
+        logger.debug("Stored quotes for %s from %s to %s", asset.identifier, start, end)
+
+
+def price_store_file(events_file: str) -> str:
+    return f"{events_file}.prices.sqlite3"
+
+
+@contextmanager
+def open_default_price_store(events_file: str) -> Iterator[PriceStore | None]:
+    file_name = os.getenv(PRICE_STORE_ENV, price_store_file(events_file))
+    if not file_name:
+        yield None
+        return
+
+    store = PriceStore(file_name)
+    try:
+        yield store
+    finally:
+        store.close()
@@ -1,12 +1,40 @@
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 import csv
 from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Callable, Dict, List, Sequence, Iterator, Iterable, Tuple
+import logging
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Sequence,
+    Iterator,
+    Iterable,
+    Tuple,
+    TypeVar,
+    cast,
+)
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from harvest import instrumentation
 from harvest.events import Asset, AssetType
 
+if TYPE_CHECKING:
+    from harvest.price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+YAHOO_FINANCE_URL = "https://query1.finance.yahoo.com/v7/finance/download"
+DEFAULT_MAX_WORKERS = 8
+# how far before a date a quote is still used as its price (weekends, holidays, etc.)
+QUOTE_LOOKBACK_DAYS = 7
+
 
 @dataclass(frozen=True)
 class Quote:
@@ -14,39 +42,225 @@ class Quote:
     price: Decimal
 
 
+QuoteFetcher = Callable[[str, date], str | None]
+QuoteRangeFetcher = Callable[[str, date, date], str | None]
+
+
+class RateLimiter:
+    def __init__(self, max_calls_per_second: float):
+        self.interval = 1.0 / max_calls_per_second
+        self.next_call = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+_session: requests.Session | None = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+def http_session(pool_size: int = DEFAULT_MAX_WORKERS) -> requests.Session:
+    # a single pooled session shared by all fetcher threads, so connections (and TLS
+    # handshakes) are re-used across symbols, the pool grows to the largest number of
+    # threads fetching at once so no connection is discarded
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers["user-agent"] = "curl/7.79.1"
+
+        if pool_size > _session_pool_size:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session_pool_size = pool_size
+
+        return _session
+
+
 def yahoo_finance_fetcher(
-    symbol: str, date: date, lookback_days: int = 7
+    symbol: str,
+    date: date,
+    lookback_days: int = QUOTE_LOOKBACK_DAYS,
+    session: requests.Session | None = None,
+    base_url: str = YAHOO_FINANCE_URL,
+) -> str | None:
+    return yahoo_finance_range_fetcher(
+        symbol,
+        date - timedelta(days=lookback_days),
+        date,
+        session=session,
+        base_url=base_url,
+    )
+
+
+def yahoo_finance_range_fetcher(
+    symbol: str,
+    start: date,
+    end: date,
+    session: requests.Session | None = None,
+    base_url: str = YAHOO_FINANCE_URL,
 ) -> str | None:
-    start_time = int(time.mktime((date - timedelta(days=lookback_days)).timetuple()))
-    end_time = int(time.mktime(date.timetuple()))
-    url = f"https://query1.finance.yahoo.com/v7/finance/download/{symbol}?period1={start_time}&period2={end_time}&interval=1d&events=history&includeAdjustedClose=true"
+    session = session or http_session()
+    start_time = int(time.mktime(start.timetuple()))
+    end_time = int(time.mktime(end.timetuple()))
+    url = f"{base_url}/{symbol}?period1={start_time}&period2={end_time}&interval=1d&events=history&includeAdjustedClose=true"
 
-    resp = requests.get(url, headers={"user-agent": "curl/7.79.1"})
+    started = time.perf_counter()
+    resp = session.get(url)
+    instrumentation.record_http(url, resp.status_code, time.perf_counter() - started)
     if resp.status_code == 200:
         return resp.text
     else:
         return None
 
 
-def lookup_prices(assets: Iterable[Asset], date: date) -> Dict[Asset, Quote]:
+def lookup_prices(
+    assets: Iterable[Asset],
+    date: date,
+    fetchers: Dict[AssetType, QuoteFetcher] | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    store: "PriceStore | None" = None,
+) -> Dict[Asset, Quote]:
+    if store:
+        return lookup_prices_for_dates(
+            assets, [date], max_workers=max_workers, store=store
+        )[date]
+
+    # the given fetchers replace the defaults for their asset types only
+    fetchers = {**quote_fetchers_by_asset_type(), **(fetchers or {})}
+    assets = list(assets)
     results = {}
-    for asset in assets:
-        if quote := fetch_quote(asset=asset, date=date):
-            results[asset] = quote
+
+    http_session(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        quotes = executor.map(
+            lambda asset: fetch_quote(
+                asset=asset, date=date, fetcher=fetchers[asset.type]
+            ),
+            assets,
+        )
+        for asset, quote in zip(assets, quotes):
+            if quote:
+                results[asset] = quote
 
     return results
 
 
-QuoteFetcher = Callable[[str, date], str | None]
+def lookup_prices_for_dates(
+    assets: Iterable[Asset],
+    dates: Sequence[date],
+    fetchers: Dict[AssetType, QuoteRangeFetcher] | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    store: "PriceStore | None" = None,
+    lookback_days: int = QUOTE_LOOKBACK_DAYS,
+) -> Dict[date, Dict[Asset, Quote]]:
+    fetchers = {**quote_range_fetchers_by_asset_type(), **(fetchers or {})}
+    assets = list(assets)
+    results: Dict[date, Dict[Asset, Quote]] = {dte: {} for dte in dates}
+    if not dates:
+        return results
+
+    if store:
+        start = min(dates) - timedelta(days=lookback_days)
+        fill_price_store(assets, start, max(dates), store, fetchers, max_workers)
+        for asset in assets:
+            quotes = store.quotes(asset)
+            for dte in dates:
+                if quote := quote_at(quotes, dte, lookback_days):
+                    results[dte][asset] = quote
+
+        return results
+
+    http_session(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        quotes_by_date = executor.map(
+            lambda asset: fetch_quotes(
+                asset=asset,
+                dates=dates,
+                fetcher=fetchers[asset.type],
+                lookback_days=lookback_days,
+            ),
+            assets,
+        )
+        for asset, quotes in zip(assets, quotes_by_date):
+            for dte, quote in quotes.items():
+                results[dte][asset] = quote
+
+    return results
+
+
+def fill_price_store(
+    assets: Iterable[Asset],
+    start: date,
+    end: date,
+    store: "PriceStore",
+    fetchers: Dict[AssetType, QuoteRangeFetcher] | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> int:
+    # only the ranges the store has never covered are fetched, concurrently, while the
+    # store itself is only written to from this thread
+    fetchers = {**quote_range_fetchers_by_asset_type(), **(fetchers or {})}
+    gaps = [(asset, gap) for asset in assets for gap in store.gaps(asset, start, end)]
+
+    http_session(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            lambda item: fetchers[item[0].type](item[0].identifier, *item[1]), gaps
+        )
+        for (asset, (gap_start, gap_end)), result in zip(gaps, results):
+            if result is not None:
+                store.add(asset, to_quotes(result), gap_start, gap_end)
+
+    logger.debug("Fetched %i missing ranges from %s to %s", len(gaps), start, end)
+    return len(gaps)
+
+
+F = TypeVar("F", bound=Callable[..., str | None])
+
+
+def rate_limited(fetcher: F, limiter: RateLimiter) -> F:
+    def rate_limited_fetcher(*args: Any) -> str | None:
+        limiter.wait()
+        return fetcher(*args)
+
+    return cast(F, rate_limited_fetcher)
+
+
+# shared across calls so the limit applies per provider, not per lookup
+YAHOO_FINANCE_RATE_LIMITER = RateLimiter(max_calls_per_second=10)
 
 
 def quote_fetchers_by_asset_type() -> Dict[AssetType, QuoteFetcher]:
     return {
-        "investment": yahoo_finance_fetcher,
+        "investment": rate_limited(yahoo_finance_fetcher, YAHOO_FINANCE_RATE_LIMITER),
         "cash": lambda _, date: f"Date,Adj Close\n{date},1.0\n",
     }
 
 
+def cash_range_fetcher(_: str, start: date, end: date) -> str:
+    days = (end - start).days + 1
+    rows = (f"{start + timedelta(days=i)},1.0" for i in range(days))
+    return "Date,Adj Close\n" + "\n".join(rows) + "\n"
+
+
+def quote_range_fetchers_by_asset_type() -> Dict[AssetType, QuoteRangeFetcher]:
+    return {
+        "investment": rate_limited(
+            yahoo_finance_range_fetcher, YAHOO_FINANCE_RATE_LIMITER
+        ),
+        "cash": cash_range_fetcher,
+    }
+
+
 def fetch_quote(
     asset: Asset,
     date: date,
@@ -54,17 +268,49 @@ def fetch_quote(
 ) -> Quote | None:
     fetcher = fetcher or quote_fetchers_by_asset_type()[asset.type]
     result = fetcher(asset.identifier, date)
-    quotes = to_quotes(result) if result else []
+    quotes = sorted(to_quotes(result), key=quote_date) if result else []
+
+    return quote_at(quotes, date)
+
 
-    for quote in sorted(quotes, key=lambda quote: quote.date, reverse=True):
-        if quote.date <= date:
-            return quote
+def fetch_quotes(
+    asset: Asset,
+    dates: Sequence[date],
+    fetcher: QuoteRangeFetcher | None = None,
+    lookback_days: int = QUOTE_LOOKBACK_DAYS,
+) -> Dict[date, Quote]:
+    # a single request covering every date, rather than one request per date
+    fetcher = fetcher or quote_range_fetchers_by_asset_type()[asset.type]
+    start = min(dates) - timedelta(days=lookback_days)
+    result = fetcher(asset.identifier, start, max(dates))
+    quotes = sorted(to_quotes(result), key=quote_date) if result else []
+
+    return {
+        dte: quote for dte in dates if (quote := quote_at(quotes, dte, lookback_days))
+    }
 
-    return None
+
+def quote_date(quote: Quote) -> date:
+    return quote.date
+
+
+def quote_at(
+    quotes: Sequence[Quote], date: date, lookback_days: int = QUOTE_LOOKBACK_DAYS
+) -> Quote | None:
+    # the latest quote on or before date, unless it is older than the lookback window
+    # (quotes must be sorted by date)
+    idx = bisect_right(quotes, date, key=quote_date)
+    if idx == 0 or quotes[idx - 1].date < date - timedelta(days=lookback_days):
+        return None
+
+    return quotes[idx - 1]
 
 
 def to_quotes(price_data: str) -> Iterator[Quote]:
     rows = list(csv.reader(price_data.splitlines()))
+    if not rows:
+        return iter(())
+
     header = rows[0]
     return map(
         lambda rec: Quote(date=rec["Date"], price=rec["Adj Close"]),
@@ -1,28 +1,35 @@
+import calendar
 import csv
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
-from functools import reduce
-from gc import is_finalized
 from typing import (
+    Any,
     Dict,
     List,
-    NamedTuple,
+    Self,
     Set,
-    Callable,
     Tuple,
-    Sequence,
-    TypeVar,
     Iterable,
-    Generator,
+    Iterator,
+    Literal,
+    TextIO,
+    cast,
+    get_args,
 )
 import logging
+import os
+import sys
+from harvest import instrumentation
 from harvest.events import (
     Allocation,
     Asset,
     Event,
     Money,
+    ReportFrequency,
+    ReportLayout,
     RunReport,
+    RunReportSeries,
     SetAllocation,
     SetBalance,
     SetPrice,
@@ -32,35 +39,50 @@ from harvest.events import (
 
 logger = logging.getLogger(__name__)
 
-T = TypeVar("T")
+ComputeEngine = Literal["decimal", "numpy"]
+COMPUTE_ENGINE_ENV = "HARVEST_COMPUTE_ENGINE"
+# set to check the numpy engine's rows against the decimal engine's on every report
+COMPUTE_VERIFY_ENV = "HARVEST_COMPUTE_VERIFY"
 
 
-def partition(
-    values: Iterable[T], fn: Callable[[T], bool]
-) -> Tuple[Sequence[T], Sequence[T]]:
-    included = []
-    excluded = []
-    for value in values:
-        if fn(value):
-            included.append(value)
-        else:
-            excluded.append(value)
-
-    return (included, excluded)
-
+def compute_engine_from_env() -> ComputeEngine:
+    engine = os.getenv(COMPUTE_ENGINE_ENV) or "decimal"
+    if engine not in get_args(ComputeEngine):
+        raise ValueError(
+            f"Unknown compute engine in {COMPUTE_ENGINE_ENV}: {engine}, expected one of "
+            f"{', '.join(get_args(ComputeEngine))}"
+        )
 
-def report_event_sort_key(event: Event) -> List:
-    match event:
-        case SetBalance(_, _, date, _, _):
-            return [0, date]
-        case SetPrice(_, date, _, _):
-            return [1, date]
-        case SetAllocation(_, date, _, _):
-            return [2, date]
-        case SetTargetAllocation(date, _, _):
-            return [3, date]
-        case _:
-            return [4]
+    return cast(ComputeEngine, engine)
+
+
+DEFAULT_COMPUTE_ENGINE = compute_engine_from_env()
+DEFAULT_COMPUTE_VERIFY = bool(os.getenv(COMPUTE_VERIFY_ENV))
+CENT = Decimal("0.01")
+
+DEFAULT_REPORT_FILE = "harvest.csv"
+WRITE_BUFFER_SIZE = 1024 * 1024
+ReportDestination = str | TextIO
+
+PREFIX_COLS = 6
+HEADER = [
+    "Account",
+    "Symbol",
+    "Shares",
+    "As Of",
+    "NAV",
+    "As Of",
+    "Stock",
+    "Stock - Large",
+    "Stock - Mid/Small",
+    "Stock - Intl",
+    "Bond",
+    "Bond - US",
+    "Bond - Intl",
+    "Cash",
+    "Other",
+    "Total",
+]
 
 
 @dataclass
@@ -91,81 +113,135 @@ class ReportRecord:
         return Money(self.amount * self.price)
 
 
-@dataclass(frozen=False)
-class ReportRecordEvents:
-    balance_event: SetBalance
-    price_event: SetPrice | None = None
-    allocation_event: SetAllocation | None = None
+class ReportBuilder:
+    # keeps only the latest (by date, then by position) event for each balance, price
+    # and allocation, so events can be applied in any order without sorting them first
+    def __init__(self) -> None:
+        self.balances: Dict[Tuple[str, Asset], SetBalance] = {}
+        self.prices: Dict[Asset, SetPrice] = {}
+        self.allocations: Dict[Asset, SetAllocation] = {}
+        self.target_allocation: SetTargetAllocation | None = None
+        self.accounts_by_asset: Dict[Asset, Set[str]] = {}
+
+    def apply(self, event: Event) -> bool:
+        match event:
+            case SetBalance(account, asset, date, _, _) as e:
+                current = self.balances.get((account, asset))
+                if current is None or date >= current.date:
+                    self.balances[(account, asset)] = e
+                    self.accounts_by_asset.setdefault(asset, set()).add(account)
+                    return True
+            case SetPrice(asset, date, _, _) as e:
+                current = self.prices.get(asset)
+                if current is None or date >= current.date:
+                    self.prices[asset] = e
+                    return True
+            case SetAllocation(asset, date, _, _) as e:
+                current = self.allocations.get(asset)
+                if current is None or date >= current.date:
+                    self.allocations[asset] = e
+                    return True
+            case SetTargetAllocation(date, _, _) as e:
+                current = self.target_allocation
+                if current is None or date >= current.date:
+                    self.target_allocation = e
+                    return True
+
+        return False
+
+    def apply_all(self, events: Iterable[Event]) -> Self:
+        for evt in events:
+            self.apply(evt)
 
-    @property
-    def asset(self):
-        self.balance_event.asset
-
-    def to_report_record(self) -> ReportRecord | None:
-        if (
-            self.balance_event is None
-            or self.price_event is None
-            or self.allocation_event is None
-        ):
-            return None
-
-        return ReportRecord(
-            account=self.balance_event.account,
-            asset=self.balance_event.asset,
-            report_date=self.balance_event.date,
-            amount=self.balance_event.amount,
-            price=self.price_event.amount,
-            price_date=self.price_event.date,
-            allocation=self.allocation_event.allocation,
-        )
+        return self
+
+    def events(self) -> List[Event]:
+        events: List[Event] = [*self.balances.values()]
+        events.extend(self.prices.values())
+        events.extend(self.allocations.values())
+        if self.target_allocation:
+            events.append(self.target_allocation)
+
+        return events
+
+    def records_for(
+        self, asset: Asset, accounts: Iterable[str] | None = None
+    ) -> Tuple[List[ReportRecord], bool]:
+        records = []
+        price = self.prices.get(asset)
+        allocation = self.allocations.get(asset)
+        all_accounts = self.accounts_by_asset.get(asset, set())
+        for account in all_accounts if accounts is None else accounts:
+            balance = self.balances[(account, asset)]
+            if balance.amount == 0:
+                continue
+            if price is None or allocation is None:
+                return [], True
+
+            records.append(
+                ReportRecord(
+                    account=account,
+                    asset=asset,
+                    report_date=balance.date,
+                    amount=balance.amount,
+                    price=price.amount,
+                    price_date=price.date,
+                    allocation=allocation.allocation,
+                )
+            )
 
+        return records, False
 
-class Report:
-    @classmethod
-    def create(cls, report_event: RunReport, events: List[Event]):
-        events = sorted(
-            filter(event_matcher(report_event.date, report_event.account), events),
-            key=report_event_sort_key,
+    def is_incomplete(self, asset: Asset) -> bool:
+        # an asset is incomplete if any account still holds it without a price or an
+        # allocation to value it with
+        if asset in self.prices and asset in self.allocations:
+            return False
+
+        return any(
+            self.balances[(account, asset)].amount != 0
+            for account in self.accounts_by_asset.get(asset, ())
         )
-        records: Dict[Tuple[str, Asset], ReportRecordEvents] = {}
-        target_allocation = None
 
-        def get_all(asset: Asset) -> Generator[ReportRecordEvents, None, None]:
-            for key in (k for k in records.keys() if k[1] == asset):
-                yield records[key]
+    def build(self) -> "Report":
+        records = []
+        incomplete_assets = set()
+        for asset in self.accounts_by_asset:
+            asset_records, incomplete = self.records_for(asset)
+            records.extend(asset_records)
+            if incomplete:
+                incomplete_assets.add(asset)
 
-        for evt in events:
-            match evt:
-                case SetBalance(account, asset, date, amount) as e:
-                    record = records.get((account, asset))
-                    if not record and amount != 0:
-                        record = ReportRecordEvents(balance_event=e)
-                        records[(account, asset)] = record
-                    elif amount == 0:
-                        del records[(account, asset)]
-                    else:
-                        record.balance_event = e
-                case SetPrice(asset, date, price) as e:
-                    for rec in get_all(asset):
-                        rec.price_event = e
-                case SetAllocation(asset, date, allocation) as e:
-                    for rec in get_all(asset):
-                        rec.allocation_event = e
-                case SetTargetAllocation(date, allocation):
-                    target_allocation = allocation
-
-        report_records = [(rec, rec.to_report_record()) for rec in records.values()]
-        complete, incomplete = partition(report_records, lambda rec: rec[1] is not None)
-        incomplete = list(filter(lambda rec: not rec, incomplete))
-        print(f"incomplete={incomplete}")
-
-        return cls(
+        logger.debug("Incomplete assets: %s", incomplete_assets)
+
+        return Report(
             records=sorted(
-                [c[1] for c in complete if c[1]],
-                key=lambda rec: (rec.account, rec.asset.identifier),
+                records, key=lambda rec: (rec.account, rec.asset.identifier)
             ),
-            incomplete_assets={rec.asset for rec in [i[0] for i in incomplete]},
-            target_allocation=target_allocation,
+            incomplete_assets=incomplete_assets,
+            target_allocation=(
+                self.target_allocation.allocation if self.target_allocation else None
+            ),
+        )
+
+
+def latest_events(events: Iterable[Event]) -> List[Event]:
+    # reduces events to the only ones a report could observe as of a date that is on or
+    # after all of them
+    return ReportBuilder().apply_all(events).events()
+
+
+class Report:
+    @classmethod
+    def create(cls, report_event: RunReport, events: Iterable[Event]) -> "Report":
+        # events are consumed as a stream in a single pass, so memory depends on the
+        # number of holdings rather than the number of events
+        return (
+            ReportBuilder()
+            .apply_all(
+                filter(event_matcher(report_event.date, report_event.account), events)
+            )
+            .build()
         )
 
     def __init__(
@@ -178,91 +254,298 @@ class Report:
         self.incomplete_assets = incomplete_assets
         self.target_allocation = target_allocation
 
-    def to_row(self, record: ReportRecord) -> List:
+    @staticmethod
+    def to_prefix(record: ReportRecord) -> List:
+        return [
+            record.account,
+            record.asset.identifier,
+            record.amount,
+            str(record.report_date),
+            record.price,
+            str(record.price_date),
+        ]
+
+    @staticmethod
+    def to_row(record: ReportRecord) -> List:
         subtotals = [v for k, v in record.subtotals().items()]
-        return (
-            [
-                record.account,
-                record.asset.identifier,
-                record.amount,
-                str(record.report_date),
-                record.price,
-                str(record.price_date),
+        return Report.to_prefix(record) + subtotals + [record.total()]
+
+    def compute(
+        self,
+        engine: ComputeEngine = DEFAULT_COMPUTE_ENGINE,
+        verify: bool = DEFAULT_COMPUTE_VERIFY,
+    ) -> List[List]:
+        if len(self.records) == 0:
+            return []
+
+        if engine == "numpy":
+            from harvest import vectorized
+
+            rows = [HEADER] + vectorized.compute_rows(
+                prefixes=[self.to_prefix(record) for record in self.records],
+                amounts=[record.amount for record in self.records],
+                prices=[record.price for record in self.records],
+                allocations=[record.allocation for record in self.records],
+                target_allocation=self.target_allocation,
+            )
+            if verify:
+                verify_rows(rows, self.compute(engine="decimal"))
+            return rows
+        elif engine != "decimal":
+            raise ValueError(f"Unknown compute engine: {engine}")
+
+        return list(self.rows())
+
+    def rows(self) -> Iterator[List]:
+        # rows are formatted one at a time while keeping running totals, followed by
+        # the summary rows, so only the records (not the formatted table) are held in
+        # memory
+        if len(self.records) == 0:
+            return
+
+        yield HEADER
+        totals: List[Money] = [Money(Decimal("0"))] * 10
+        for record in self.records:
+            row = self.to_row(record)
+            totals = [total + value for total, value in zip(totals, row[PREFIX_COLS:])]
+            yield row
+
+        yield from summary_rows(totals, self.target_allocation)
+
+    def write_to_file(
+        self,
+        destination: ReportDestination = DEFAULT_REPORT_FILE,
+        engine: ComputeEngine = DEFAULT_COMPUTE_ENGINE,
+    ) -> str:
+        if engine == "decimal" and not instrumentation.enabled():
+            # rows are written to the destination as they are formatted
+            return write_rows(self.rows(), destination)
+
+        with instrumentation.phase("compute"):
+            rows = self.compute(engine=engine)
+        with instrumentation.phase("write_to_file"):
+            return write_rows(rows, destination)
+
+
+class LiveReport:
+    # a long-lived report that is updated as events are appended, re-computing only
+    # the rows affected by each event and keeping running totals
+    def __init__(self, report_event: RunReport):
+        self.matcher = event_matcher(report_event.date, report_event.account)
+        self.builder = ReportBuilder()
+        self.rows: Dict[Tuple[str, Asset], List] = {}
+        self.totals: List[Money] = [Money(Decimal("0"))] * 10
+        self.incomplete_assets: Set[Asset] = set()
+
+    @property
+    def target_allocation(self) -> Allocation | None:
+        target_allocation = self.builder.target_allocation
+        return target_allocation.allocation if target_allocation else None
+
+    def apply(self, event: Event) -> bool:
+        if not self.matcher(event) or not self.builder.apply(event):
+            return False
+
+        match event:
+            case SetBalance(account, asset):
+                self.refresh(asset, accounts={account})
+            case SetPrice(asset) | SetAllocation(asset):
+                self.refresh(asset, accounts=self.builder.accounts_by_asset.get(asset))
+
+        return True
+
+    def apply_all(self, events: Iterable[Event]) -> int:
+        return sum(self.apply(evt) for evt in events)
+
+    def refresh(self, asset: Asset, accounts: Set[str] | None) -> None:
+        for account in accounts or ():
+            if row := self.rows.pop((account, asset), None):
+                self.totals = [
+                    total - value
+                    for total, value in zip(self.totals, row[PREFIX_COLS:])
+                ]
+
+        records, _ = self.builder.records_for(asset, accounts)
+        for record in records:
+            row = Report.to_row(record)
+            self.rows[(record.account, asset)] = row
+            self.totals = [
+                total + value for total, value in zip(self.totals, row[PREFIX_COLS:])
             ]
-            + subtotals
-            + [record.total()]
-        )
+
+        # other accounts holding the asset can keep it incomplete
+        if self.builder.is_incomplete(asset):
+            self.incomplete_assets.add(asset)
+        else:
+            self.incomplete_assets.discard(asset)
 
     def compute(self) -> List[List]:
-        if len(self.records) == 0:
+        if len(self.rows) == 0:
             return []
 
-        prefix_cols = 6
-
-        def reducer(memo: List[Decimal], val: List) -> List[Decimal]:
-            return map(lambda arg: arg[1] + arg[0], zip(memo, val[prefix_cols:]))
-
-        rows = [
-            [
-                "Account",
-                "Symbol",
-                "Shares",
-                "As Of",
-                "NAV",
-                "As Of",
-                "Stock",
-                "Stock - Large",
-                "Stock - Mid/Small",
-                "Stock - Intl",
-                "Bond",
-                "Bond - US",
-                "Bond - Intl",
-                "Cash",
-                "Other",
-                "Total",
+        keys = sorted(self.rows, key=lambda key: (key[0], key[1].identifier))
+        rows = [HEADER] + [self.rows[key] for key in keys]
+
+        return rows + summary_rows(self.totals, self.target_allocation)
+
+    def write_to_file(
+        self, destination: ReportDestination = DEFAULT_REPORT_FILE
+    ) -> str:
+        return write_rows(self.compute(), destination)
+
+
+def summary_rows(totals: List, target_allocation: Allocation | None) -> List[List]:
+    rows = []
+    percentages = [round((sub / totals[-1]) * 100, 2) for sub in totals[:-1]]
+    rows.append(["Totals"] + ([""] * (PREFIX_COLS - 1)) + totals)
+    rows.append(["Percentages"] + ([""] * (PREFIX_COLS - 1)) + list(percentages) + [""])
+
+    if target_allocation:
+        rows.append(
+            ["Target Percentages"]
+            + ([""] * (PREFIX_COLS - 1))
+            + [
+                target_allocation.stock,
+                target_allocation.stock_large,
+                target_allocation.stock_mid_small,
+                target_allocation.stock_intl,
+                target_allocation.bond,
+                target_allocation.bond_us,
+                target_allocation.bond_intl,
+                target_allocation.cash,
+                target_allocation.other,
             ]
-        ] + [self.to_row(record) for record in self.records]
+            + [""]
+        )
 
-        totals = list(reduce(reducer, rows[1:], [Decimal("0")] * 10))
-        percentages = [round((sub / totals[-1]) * 100, 2) for sub in totals[:-1]]
-        rows.append(["Totals"] + ([""] * (prefix_cols - 1)) + totals)
+        corrections = map(
+            lambda t: (totals[-1] * ((t[1] - t[0]) / 100)),
+            zip(percentages, rows[-1][PREFIX_COLS:15]),
+        )
         rows.append(
-            ["Percentages"] + ([""] * (prefix_cols - 1)) + list(percentages) + [""]
+            ["Corrections"] + ([""] * (PREFIX_COLS - 1)) + list(corrections) + [""]
         )
 
-        if self.target_allocation:
-            rows.append(
-                ["Target Percentages"]
-                + ([""] * (prefix_cols - 1))
-                + [
-                    self.target_allocation.stock,
-                    self.target_allocation.stock_large,
-                    self.target_allocation.stock_mid_small,
-                    self.target_allocation.stock_intl,
-                    self.target_allocation.bond,
-                    self.target_allocation.bond_us,
-                    self.target_allocation.bond_intl,
-                    self.target_allocation.cash,
-                    self.target_allocation.other,
-                ]
-                + [""]
-            )
+    return rows
+
+
+def verify_rows(rows: List[List], expected: List[List]) -> None:
+    # checks that every amount matches the exact Decimal computation to the cent
+    def to_decimal(value: Any) -> Any:
+        return value.amount if isinstance(value, Money) else value
+
+    for i, (row, expected_row) in enumerate(zip(rows, expected)):
+        for j, (value, expected_value) in enumerate(zip(row, expected_row)):
+            value, expected_value = to_decimal(value), to_decimal(expected_value)
+            if isinstance(expected_value, Decimal):
+                matches = abs(value - expected_value) <= CENT
+            else:
+                matches = value == expected_value
+            if not matches:
+                raise ValueError(
+                    "Report value at row {}, column {} is {}, expected {}".format(
+                        i, j, value, expected_value
+                    )
+                )
+
+    if len(rows) != len(expected):
+        raise ValueError(f"Report has {len(rows)} rows, expected {len(expected)}")
+
+
+def write_rows(
+    rows: Iterable[List], destination: ReportDestination = DEFAULT_REPORT_FILE
+) -> str:
+    # destination is a file path, "-" for stdout or a file-like object
+    if not isinstance(destination, str):
+        # counted in characters, the same as bytes for an ASCII report
+        instrumentation.count("bytes_written", write_csv(rows, destination))
+        return getattr(destination, "name", repr(destination))
+    elif destination == "-":
+        write_rows(rows, sys.stdout)
+        return destination
+
+    with open(destination, "w", buffering=WRITE_BUFFER_SIZE) as csv_file:
+        write_csv(rows, csv_file)
+
+    instrumentation.count("bytes_written", os.path.getsize(destination))
+    return destination
+
+
+def write_csv(rows: Iterable[List], file: TextIO) -> int:
+    writer = csv.writer(file, delimiter=",")
+    return sum(writer.writerow(row) for row in rows)
+
+
+def period_end(dte: date, frequency: ReportFrequency) -> date:
+    match frequency:
+        case "daily":
+            return dte
+        case "weekly":
+            return dte + timedelta(days=6 - dte.weekday())
+        case "monthly":
+            return dte.replace(day=calendar.monthrange(dte.year, dte.month)[1])
+        case "quarterly":
+            month = ((dte.month - 1) // 3) * 3 + 3
+            return date(dte.year, month, calendar.monthrange(dte.year, month)[1])
+        case "yearly":
+            return date(dte.year, 12, 31)
+        case _:
+            raise ValueError(f"Unknown report frequency: {frequency}")
 
-            corrections = map(
-                lambda t: (totals[-1] * ((t[1] - t[0]) / 100)),
-                zip(percentages, rows[-1][prefix_cols:15]),
-            )
-            rows.append(
-                ["Corrections"] + ([""] * (prefix_cols - 1)) + list(corrections) + [""]
-            )
 
-        return rows
+def series_dates(start: date, end: date, frequency: ReportFrequency) -> List[date]:
+    # the end of every period (week, month, etc.) between start and end
+    dates = []
+    dte = period_end(start, frequency)
+    while dte <= end:
+        dates.append(dte)
+        dte = period_end(dte + timedelta(days=1), frequency)
+
+    return dates
+
+
+def event_date(event: Event) -> date:
+    return event.date
+
+
+def report_series(
+    series: RunReportSeries, events: Iterable[Event]
+) -> Iterator[Tuple[date, List[List], Set[Asset]]]:
+    # sorts the events once, then sweeps forward through time applying them to a single
+    # live report that is captured at each report date
+    report = LiveReport(RunReport(series.end, series.account))
+    pending = iter(sorted(filter(report.matcher, events), key=event_date))
+    evt = next(pending, None)
+
+    for dte in series_dates(series.start, series.end, series.frequency):
+        while evt is not None and evt.date <= dte:
+            report.apply(evt)
+            evt = next(pending, None)
+
+        yield dte, report.compute(), set(report.incomplete_assets)
+
+
+def write_series(
+    reports: Iterable[Tuple[date, List[List], Set[Asset]]],
+    layout: ReportLayout = "long",
+    filename: str = "harvest-series.csv",
+) -> Tuple[str, Set[Asset]]:
+    incomplete_assets: Set[Asset] = set()
+    if layout == "files":
+        prefix, _, extension = filename.rpartition(".")
+        for dte, rows, incomplete in reports:
+            write_rows(rows, f"{prefix}-{dte}.{extension}")
+            incomplete_assets |= incomplete
+
+        return f"{prefix}-*.{extension}", incomplete_assets
 
-    def write_to_file(self) -> str:
-        filename = "harvest.csv"
-        with open(filename, "w") as csv_file:
-            writer = csv.writer(csv_file, delimiter=",")
-            for row in self.compute():
-                writer.writerow(row)
+    with open(filename, "w") as csv_file:
+        writer = csv.writer(csv_file, delimiter=",")
+        writer.writerow(["Report Date"] + HEADER)
+        for dte, rows, incomplete in reports:
+            for row in rows[1:]:
+                writer.writerow([str(dte)] + row)
+            incomplete_assets |= incomplete
 
-        return filename
+    instrumentation.count("bytes_written", os.path.getsize(filename))
+    return filename, incomplete_assets
@@ -0,0 +1,188 @@
+from bisect import bisect_right, insort
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+from harvest.actions import is_jsonl_log, resolve_prices, write_event
+from harvest.client import INCOMPLETE_SYMBOLS_HEADER
+from harvest.event_log import complete_size, iter_events
+from harvest.events import (
+    Event,
+    RunReport,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+    SetTargetAllocation,
+    event_matcher,
+    parse_event,
+)
+from harvest.report import Report, event_date
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8765
+
+HistoryKey = Tuple[Any, ...]
+
+
+def history_key(event: Event) -> HistoryKey | None:
+    match event:
+        case SetBalance(account=account, asset=asset):
+            return SetBalance, account, asset
+        case SetPrice(asset=asset):
+            return SetPrice, asset
+        case SetAllocation(asset=asset):
+            return SetAllocation, asset
+        case SetTargetAllocation():
+            return (SetTargetAllocation,)
+        case _:
+            return None
+
+
+class EventHistory:
+    # every balance, price and allocation ordered by date (then position in the log), so
+    # the events a report observes as of any date are found by bisection instead of a
+    # pass over the whole log
+    def __init__(self) -> None:
+        self.histories: Dict[HistoryKey, List[Event]] = {}
+
+    def apply(self, event: Event) -> None:
+        if key := history_key(event):
+            insort(self.histories.setdefault(key, []), event, key=event_date)
+
+    def as_of(self, target_date: date, target_account: str | None) -> List[Event]:
+        matcher = event_matcher(target_date, target_account)
+        events = []
+        for history in self.histories.values():
+            idx = bisect_right(history, target_date, key=event_date)
+            if idx > 0 and matcher(history[idx - 1]):
+                events.append(history[idx - 1])
+
+        return events
+
+
+class ReportState:
+    # the parsed log kept in memory and caught up with whatever was appended to it
+    # (by this server or anyone else) before each request
+    def __init__(self, events_file: str):
+        self.events_file = events_file
+        self.history = EventHistory()
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        size = (
+            os.path.getsize(self.events_file) if os.path.exists(self.events_file) else 0
+        )
+        if size < self.offset:
+            # the log was rewritten, start over
+            self.history = EventHistory()
+            self.offset = 0
+
+        if size > self.offset:
+            end = complete_size(self.events_file)
+            for evt in iter_events(self.events_file, self.offset, end):
+                self.history.apply(evt)
+            self.offset = end
+
+    def add_event(self, event: Event) -> None:
+        with self.lock:
+            write_event(event, file_name=self.events_file)
+            self.refresh()
+
+    def run_report(self, report_event: RunReport) -> Report:
+        with self.lock:
+            self.refresh()
+            events = self.history.as_of(report_event.date, report_event.account)
+            # fetched quotes are appended to the log, so they are only looked up once
+            events.extend(
+                resolve_prices(events, report_event.date, events_file=self.events_file)
+            )
+            self.refresh()
+
+        return Report.create(report_event, events)
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    server: "ReportServer"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/report":
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        query = parse_qs(url.query)
+        try:
+            dte = date.fromisoformat(query["date"][0])
+        except (KeyError, ValueError):
+            return self.send_error(HTTPStatus.BAD_REQUEST, "A report date is required")
+
+        self.send_report(RunReport(date=dte, account=query.get("account", [None])[0]))
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/events":
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            event = parse_event(
+                body["event"], date.fromisoformat(body["date"]), *body.get("args", [])
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            return self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+
+        match event:
+            case RunReport():
+                self.send_report(event)
+            case SetBalance() | SetPrice() | SetAllocation() | SetTargetAllocation():
+                self.server.state.add_event(event)
+                self.send_response(HTTPStatus.NO_CONTENT)
+                self.end_headers()
+            case _:
+                self.send_error(HTTPStatus.BAD_REQUEST, f"Unsupported event: {event}")
+
+    def send_report(self, report_event: RunReport) -> None:
+        report = self.server.state.run_report(report_event)
+        output = io.StringIO()
+        report.write_to_file(output)
+        body = output.getvalue().encode()
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header(
+            INCOMPLETE_SYMBOLS_HEADER,
+            ",".join(sorted(asset.identifier for asset in report.incomplete_assets)),
+        )
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args)
+
+
+class ReportServer(ThreadingHTTPServer):
+    def __init__(self, events_file: str, address: Tuple[str, int]):
+        if not is_jsonl_log(events_file):
+            raise ValueError(f"Serving is only supported for JSONL logs: {events_file}")
+
+        super().__init__(address, ReportRequestHandler)
+        self.state = ReportState(events_file)
+        self.state.refresh()
+
+
+def serve(
+    events_file: str,
+    host: str = DEFAULT_SERVER_HOST,
+    port: int = DEFAULT_SERVER_PORT,
+) -> None:
+    with ReportServer(events_file, (host, port)) as server:
+        logger.info("Serving reports for %s on %s:%i", events_file, host, port)
+        server.serve_forever()
@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from datetime import date
+import logging
+import os
+from typing import Any, Dict, Iterator, List
+from harvest.event_log import complete_size, iter_events
+from harvest.events import (
+    REPORT_EVENT_TYPES,
+    Event,
+    EventPrefilter,
+    parse_event_json,
+    to_event_json,
+)
+from harvest.report import ReportBuilder
+
+logger = logging.getLogger(__name__)
+
+# number of events appended to the log after the latest snapshot before a new one is taken
+SNAPSHOT_INTERVAL = 1000
+
+
+@dataclass(frozen=True)
+class SnapshotInfo:
+    path: str
+    # byte offset in the events file of the first event that is not in the snapshot
+    offset: int
+    # latest date of any event in the snapshot, the snapshot can only be used for reports
+    # on or after this date
+    date: date
+
+
+def snapshot_dir(events_file: str) -> str:
+    return f"{events_file}.snapshots"
+
+
+def list_snapshots(events_file: str) -> List[SnapshotInfo]:
+    directory = snapshot_dir(events_file)
+    if not os.path.isdir(directory):
+        return []
+
+    snapshots = []
+    for name in os.listdir(directory):
+        if name.startswith("snapshot-") and name.endswith(".jsonl"):
+            offset, dte = name[len("snapshot-") : -len(".jsonl")].split("-", 1)
+            snapshots.append(
+                SnapshotInfo(
+                    path=os.path.join(directory, name),
+                    offset=int(offset),
+                    date=date.fromisoformat(dte),
+                )
+            )
+
+    return sorted(snapshots, key=lambda snapshot: snapshot.offset)
+
+
+def read_snapshot(snapshot: SnapshotInfo) -> List[Event]:
+    with open(snapshot.path, "r") as file:
+        return [parse_event_json(line.strip()) for line in file.readlines()]
+
+
+def write_snapshot(events_file: str, offset: int, events: List[Event]) -> SnapshotInfo:
+    directory = snapshot_dir(events_file)
+    os.makedirs(directory, exist_ok=True)
+    dte = max((evt.date for evt in events), default=date.min)
+    path = os.path.join(directory, f"snapshot-{offset:020d}-{dte}.jsonl")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        for evt in events:
+            file.write(to_event_json(evt))
+            file.write("\n")
+    os.replace(tmp_path, path)
+
+    logger.debug("Wrote snapshot of %i events at offset %i", len(events), offset)
+    return SnapshotInfo(path=path, offset=offset, date=dte)
+
+
+def iter_events_as_of(
+    events_file: str,
+    report_date: date,
+    interval: int = SNAPSHOT_INTERVAL,
+    prefilter: EventPrefilter | None = None,
+) -> Iterator[Event]:
+    snapshots = list_snapshots(events_file)
+    usable = [snapshot for snapshot in snapshots if snapshot.date <= report_date]
+    snapshot = usable[-1] if usable else None
+    offset = snapshot.offset if snapshot else 0
+    end = complete_size(events_file)
+
+    latest = ReportBuilder()
+    for evt in read_snapshot(snapshot) if snapshot else []:
+        latest.apply(evt)
+        yield evt
+
+    # a new snapshot needs every event a report could use, so none is written once
+    # the prefilter has skipped one (a report before the latest events, or for a
+    # single account)
+    skipped = 0
+
+    def keep(evt: Dict[str, Any]) -> bool:
+        nonlocal skipped
+        if prefilter is None or prefilter(evt):
+            return True
+        skipped += evt.get("type") in REPORT_EVENT_TYPES
+        return False
+
+    count = 0
+    for evt in iter_events(events_file, offset, end, keep if prefilter else None):
+        latest.apply(evt)
+        count += 1
+        yield evt
+
+    logger.debug(
+        "Read %i events from file %s after offset %i", count, events_file, offset
+    )
+
+    is_latest = snapshot == (snapshots[-1] if snapshots else None)
+    if is_latest and not skipped and count >= interval:
+        write_snapshot(events_file, end, latest.events())
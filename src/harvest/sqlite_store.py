@@ -0,0 +1,151 @@
+from datetime import date
+import logging
+import sqlite3
+from typing import Iterable, List, Tuple
+from harvest.event_log import BatchedEventWriter
+from harvest.events import (
+    Event,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+    SetTargetAllocation,
+    UnknownEvent,
+    parse_event_json,
+    to_event_json,
+)
+
+logger = logging.getLogger(__name__)
+
+SQLITE_EXTENSIONS = (".sqlite3", ".sqlite", ".db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    date TEXT,
+    account TEXT,
+    asset TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_type_date ON events (type, date);
+CREATE INDEX IF NOT EXISTS events_type_account_date ON events (type, account, date);
+CREATE INDEX IF NOT EXISTS events_asset_date ON events (asset, date);
+"""
+
+EventRow = Tuple[str, str | None, str | None, str | None, str]
+
+
+def is_sqlite_store(file_name: str) -> bool:
+    return file_name.endswith(SQLITE_EXTENSIONS)
+
+
+def connect(file_name: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(file_name)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def to_row(event: Event, data: str | None = None) -> EventRow:
+    if isinstance(event, UnknownEvent):
+        return ("UnknownEvent", None, None, None, data or event.event)
+
+    dte = getattr(event, "date", None)
+    account = getattr(event, "account", None)
+    asset = getattr(event, "asset", None)
+    return (
+        type(event).__name__,
+        str(dte) if dte else None,
+        account,
+        asset.identifier if asset else None,
+        data or to_event_json(event),
+    )
+
+
+def insert_rows(conn: sqlite3.Connection, rows: Iterable[EventRow]) -> int:
+    cursor = conn.executemany(
+        "INSERT INTO events (type, date, account, asset, data) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    return cursor.rowcount
+
+
+class SqliteEventWriter(BatchedEventWriter):
+    def open(self) -> None:
+        self.conn = connect(file_name=self.file_name)
+        if not self.fsync:
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    def write_batch(self, events: List[Event]) -> None:
+        with self.conn:
+            insert_rows(self.conn, (to_row(evt) for evt in events))
+
+
+def read_events(
+    file_name: str,
+    target_date: date | None = None,
+    target_account: str | None = None,
+) -> List[Event]:
+    conn = connect(file_name)
+    try:
+        if target_date is None:
+            rows = conn.execute("SELECT data FROM events ORDER BY id")
+        else:
+            # the same predicates as event_matcher, run as indexed queries
+            query, params = matcher_query(target_date, target_account)
+            rows = conn.execute(query, params)
+
+        events = [parse_event_json(data) for (data,) in rows]
+    finally:
+        conn.close()
+
+    logger.debug("Read %i events from store %s", len(events), file_name)
+    return events
+
+
+def matcher_query(
+    target_date: date, target_account: str | None
+) -> Tuple[str, List[str]]:
+    dte = target_date.isoformat()
+    queries = []
+    params = []
+
+    if target_account is None:
+        queries.append("SELECT id, data FROM events WHERE type = ? AND date <= ?")
+        params.extend([SetBalance.__name__, dte])
+    else:
+        queries.append(
+            "SELECT id, data FROM events WHERE type = ? AND account = ? AND date <= ?"
+        )
+        params.extend([SetBalance.__name__, target_account, dte])
+
+    for event_type in (SetPrice, SetAllocation, SetTargetAllocation):
+        queries.append("SELECT id, data FROM events WHERE type = ? AND date <= ?")
+        params.extend([event_type.__name__, dte])
+
+    query = "SELECT data FROM ({}) ORDER BY id".format(" UNION ALL ".join(queries))
+    return query, params
+
+
+def import_jsonl(jsonl_file: str, file_name: str, batch_size: int = 10000) -> int:
+    count = 0
+    with open(jsonl_file, "r") as input, connect(file_name) as conn:
+        batch = []
+        for line in input:
+            data = line.strip()
+            if not data:
+                continue
+
+            batch.append(to_row(parse_event_json(data), data=data))
+            if len(batch) >= batch_size:
+                count += insert_rows(conn, batch)
+                batch = []
+
+        count += insert_rows(conn, batch)
+    conn.close()
+
+    logger.debug("Imported %i events from %s into %s", count, jsonl_file, file_name)
+    return count
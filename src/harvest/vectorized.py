@@ -0,0 +1,90 @@
+from decimal import Decimal
+from typing import List, Sequence
+from harvest.events import Allocation, Money
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "The numpy compute engine requires numpy: poetry install --extras numpy"
+    ) from e
+
+# the allocation columns of a report row, in order
+ALLOCATION_COLUMNS = (
+    "stock",
+    "stock_large",
+    "stock_mid_small",
+    "stock_intl",
+    "bond",
+    "bond_us",
+    "bond_intl",
+    "cash",
+    "other",
+)
+
+
+def allocation_matrix(allocations: Sequence[Allocation]) -> "np.ndarray":
+    # N x 9 matrix of allocation fractions, one row per record
+    return (
+        np.array(
+            [
+                [float(getattr(allocation, column)) for column in ALLOCATION_COLUMNS]
+                for allocation in allocations
+            ],
+            dtype=np.float64,
+        ).reshape(len(allocations), len(ALLOCATION_COLUMNS))
+        / 100
+    )
+
+
+def to_money(value: float) -> Money:
+    return Money(Decimal(repr(float(value))))
+
+
+def compute_rows(
+    prefixes: Sequence[List],
+    amounts: Sequence[Decimal],
+    prices: Sequence[Decimal],
+    allocations: Sequence[Allocation],
+    target_allocation: Allocation | None,
+) -> List[List]:
+    # subtotals for every record are a single N x 9 by N broadcast multiply, and the
+    # totals, percentages and corrections are vector operations on the column sums
+    totals = np.array(
+        [float(amount * price) for amount, price in zip(amounts, prices)],
+        dtype=np.float64,
+    )
+    subtotals = allocation_matrix(allocations) * totals[:, np.newaxis]
+    column_totals = np.append(subtotals.sum(axis=0), totals.sum())
+    percentages = np.round(column_totals[:-1] / column_totals[-1] * 100, 2)
+    padding = [""] * (len(prefixes[0]) - 1)
+
+    rows = [
+        prefix + [to_money(value) for value in record_subtotals] + [to_money(total)]
+        for prefix, record_subtotals, total in zip(prefixes, subtotals, totals)
+    ]
+    rows.append(["Totals"] + padding + [to_money(value) for value in column_totals])
+    rows.append(
+        ["Percentages"]
+        + padding
+        + [round(Decimal(repr(float(value))), 2) for value in percentages]
+        + [""]
+    )
+
+    if target_allocation:
+        targets = allocation_matrix([target_allocation])[0] * 100
+        corrections = column_totals[-1] * ((targets - percentages) / 100)
+        rows.append(
+            ["Target Percentages"]
+            + padding
+            + [getattr(target_allocation, column) for column in ALLOCATION_COLUMNS]
+            + [""]
+        )
+        rows.append(
+            ["Corrections"]
+            + padding
+            + [to_money(value) for value in corrections]
+            + [""]
+        )
+
+    return rows
@@ -1,10 +1,11 @@
 import os
 import sys
 from datetime import date
-from decimal import Decimal
 import logging
 from harvest.events import parse_event
-from harvest.actions import handle_event
+from harvest.actions import events_file_name, handle_event
+from harvest.client import SERVER_ENV, send_event
+from harvest import instrumentation
 
 
 def main():
@@ -17,9 +18,19 @@ def main():
     cmd = sys.argv[1]
     dte = date.fromisoformat(sys.argv[2])
 
+    if server_url := os.getenv(SERVER_ENV):
+        return send_event(server_url, cmd, dte, sys.argv[3:])
+
+    instrumentation_output = os.getenv(instrumentation.INSTRUMENTATION_ENV)
+    if instrumentation_output:
+        instrumentation.enable()
+
     event = parse_event(cmd, dte, *sys.argv[3:])
-    events_file = f"harvest.{env}.jsonl"
-    handle_event(event, events_file=f"harvest.{env}.jsonl")
+    events_file = events_file_name(env, store=os.getenv("HARVEST_EVENT_STORE"))
+    handle_event(event, events_file=events_file)
+
+    if instrumentation_output:
+        instrumentation.emit(instrumentation_output)
 
 
 if __name__ == "__main__":
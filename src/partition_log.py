@@ -0,0 +1,15 @@
+import sys
+from harvest.actions import read_events
+from harvest.partitioned_log import partition_log
+
+
+def main(input_path, output_path, by_account):
+    count = partition_log(read_events(input_path), output_path, by_account=by_account)
+    print(f"Partitioned {count} events into {output_path}")
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) in (3, 4)
+    assert len(sys.argv) == 3 or sys.argv[3] == "--by-account"
+
+    main(sys.argv[1], sys.argv[2], by_account=len(sys.argv) == 4)
@@ -0,0 +1,20 @@
+import logging
+import os
+import sys
+from harvest.actions import events_file_name
+from harvest.server import DEFAULT_SERVER_PORT, serve
+
+
+def main(port):
+    env = (os.getenv("PYTHON_ENV") or "DEV").lower()
+    logging.basicConfig(filename=f"{env}.log", encoding="utf-8", level=logging.DEBUG)
+
+    events_file = events_file_name(env, store=os.getenv("HARVEST_EVENT_STORE"))
+    print(f"Serving reports for {events_file} on http://127.0.0.1:{port}")
+    serve(events_file, port=port)
+
+
+if __name__ == "__main__":
+    assert len(sys.argv) <= 2
+
+    main(int(sys.argv[1]) if len(sys.argv) == 2 else DEFAULT_SERVER_PORT)
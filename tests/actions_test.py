@@ -0,0 +1,137 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import os
+import subprocess
+import sys
+import harvest.actions
+from harvest.actions import handle_event, is_price_current, read_events, write_event
+from harvest.events import (
+    Allocation,
+    Asset,
+    RunReport,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+)
+from harvest.quotes import Quote
+
+
+def test_run_report_persists_fetched_prices(tmp_path, monkeypatch):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    xyz = Asset.for_symbol("XYZ")
+    report_date = date.fromisoformat("2022-05-27")
+
+    write_event(
+        SetBalance(
+            "account1",
+            xyz,
+            date.fromisoformat("2022-05-01"),
+            Decimal("10"),
+            datetime.now(timezone.utc),
+        ),
+        file_name=events_file,
+    )
+    write_event(
+        SetAllocation(
+            xyz,
+            date.fromisoformat("2022-05-01"),
+            Allocation(
+                stock_large=Decimal("100"),
+                stock_mid_small=Decimal("0"),
+                stock_intl=Decimal("0"),
+                bond_us=Decimal("0"),
+                bond_intl=Decimal("0"),
+                cash=Decimal("0"),
+            ),
+            datetime.now(timezone.utc),
+        ),
+        file_name=events_file,
+    )
+
+    lookups = []
+
+    def fake_lookup_prices(assets, date, events_file):
+        lookups.append(set(assets))
+        return {asset: Quote(date=date, price=Decimal("12.34")) for asset in assets}
+
+    monkeypatch.setattr(harvest.actions, "lookup_prices", fake_lookup_prices)
+    monkeypatch.chdir(tmp_path)
+
+    handle_event(RunReport(report_date), events_file=events_file)
+    handle_event(RunReport(report_date), events_file=events_file)
+
+    assert lookups == [{xyz}]
+    prices = [e for e in read_events(events_file) if isinstance(e, SetPrice)]
+    assert len(prices) == 1
+    assert prices[0].asset == xyz
+    assert prices[0].date == report_date
+    assert prices[0].amount == Decimal("12.34")
+
+
+def test_writing_events_does_not_import_quotes(tmp_path):
+    src_dir = os.path.join(os.path.dirname(__file__), "..", "src")
+    script = (
+        "import sys, main; main.main(); "
+        "lazy = {'requests', 'sqlite3', 'harvest.quotes', 'harvest.sqlite_store', "
+        "'harvest.partitioned_log'}; "
+        "print(sorted(lazy & set(sys.modules)))"
+    )
+    args = [
+        "set_balance",
+        "2022-01-01",
+        "account1",
+        "XYZ",
+        "1.5",
+        "2022-01-01T00:00:00",
+    ]
+    proc = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": src_dir, "PYTHON_ENV": "test"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert proc.stdout.strip() == "[]"
+    assert len(read_events(str(tmp_path / "harvest.test.jsonl"))) == 1
+
+
+def test_report_to_stdout_keeps_stdout_to_the_csv(tmp_path, monkeypatch, capsys):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    xyz = Asset.for_symbol("XYZ")
+    report_date = date(2022, 5, 27)
+    now = datetime.now(timezone.utc)
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    for evt in (
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetAllocation(xyz, date(2022, 5, 1), allocation, now),
+        SetPrice(xyz, report_date, Decimal("12.34"), now),
+    ):
+        write_event(evt, file_name=events_file)
+    monkeypatch.chdir(tmp_path)
+
+    handle_event(RunReport(report_date, output="-"), events_file=events_file)
+
+    out, err = capsys.readouterr()
+    assert out.startswith("Account,Symbol,")
+    assert "Report written" not in out
+    assert "Report written to file: -" in err
+
+
+def test_backfilled_prices_are_not_current_for_later_dates():
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    friday = SetPrice(xyz, date(2022, 5, 27), Decimal("1"), now)
+    backfilled = SetPrice(xyz, date(2020, 1, 2), Decimal("1"), now)
+
+    assert is_price_current(friday, date(2022, 5, 29))
+    assert not is_price_current(backfilled, date(2022, 5, 29))
+    assert is_price_current(backfilled, date(2020, 1, 2))
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import os
+from harvest.actions import read_events, write_event
+from harvest.compaction import compact_log
+from harvest.events import (
+    Allocation,
+    Asset,
+    RunReport,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+)
+from harvest.report import Report
+from harvest.snapshots import iter_events_as_of, snapshot_dir
+
+
+def test_compact_log_drops_superseded_events(tmp_path):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    events = [
+        SetAllocation(xyz, date(2022, 1, 1), allocation, now),
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("1"), now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("2"), now),
+        SetBalance("account2", xyz, date(2022, 5, 1), Decimal("3"), now),
+        SetBalance("account1", xyz, date(2022, 6, 1), Decimal("4"), now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("11"), now),
+    ]
+    for evt in events:
+        write_event(evt, file_name=events_file)
+    with open(events_file, "a") as file:
+        file.write(json.dumps({"type": "FileWritten", "path": "harvest.csv"}) + "\n")
+        file.write(json.dumps({"type": "Note", "text": "kept"}) + "\n")
+
+    report_dates = (date(2022, 5, 15), date(2022, 6, 15))
+    before = [
+        Report.create(RunReport(dte), list(iter_events_as_of(events_file, dte, 2)))
+        for dte in report_dates
+    ]
+    assert os.path.isdir(snapshot_dir(events_file))
+
+    result = compact_log(events_file)
+    assert (result.kept, result.dropped) == (6, 3)
+    assert not os.path.exists(snapshot_dir(events_file))
+
+    compacted = read_events(events_file)
+    assert compacted[:5] == [events[0], *events[3:]]
+    assert json.loads(compacted[5].event) == {"type": "Note", "text": "kept"}
+    assert all(report.records for report in before)
+    assert [
+        Report.create(RunReport(dte), read_events(events_file)).records
+        for dte in report_dates
+    ] == [report.records for report in before]
@@ -0,0 +1,135 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from functools import partial
+import itertools
+import os
+import pytest
+from harvest import event_log
+from harvest.actions import latest_matching_events, open_event_writer, read_events
+from harvest.event_log import (
+    iter_events,
+    map_ranges,
+    read_events_parallel,
+    split_ranges,
+)
+from harvest.events import Asset, EventPrefilter, SetBalance, event_matcher
+from harvest.report import latest_events
+
+
+@pytest.mark.parametrize("file_name", ["harvest.test.jsonl", "harvest.test.sqlite3"])
+def test_event_writer_flushes_in_batches(tmp_path, file_name):
+    events_file = str(tmp_path / file_name)
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance(
+            f"account{i}", Asset.for_symbol("XYZ"), date(2022, 5, 1), Decimal(i), now
+        )
+        for i in range(5)
+    ]
+
+    with open_event_writer(events_file, flush_every=2, flush_interval=60) as writer:
+        for evt in events[:3]:
+            writer.write(evt)
+        assert read_events(events_file) == events[:2]
+
+        for evt in events[3:]:
+            writer.write(evt)
+        assert read_events(events_file) == events[:4]
+
+    assert read_events(events_file) == events
+
+
+def test_parallel_parsing_preserves_log_order(tmp_path, monkeypatch):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance(
+            f"account{i % 3}",
+            Asset.for_symbol(f"SYM{i % 7}"),
+            date(2022, 1, 1 + i % 28),
+            Decimal(i),
+            now,
+        )
+        for i in range(500)
+    ]
+    with open_event_writer(events_file) as writer:
+        for evt in events:
+            writer.write(evt)
+
+    ranges = split_ranges(events_file, 8)
+    assert len(ranges) == 8
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(events_file)
+    assert all(prev[1] == cur[0] for prev, cur in zip(ranges, ranges[1:]))
+    assert read_events_parallel(events_file, workers=2) == events
+
+    monkeypatch.setattr(event_log, "MIN_PARALLEL_SIZE", 0)
+    monkeypatch.setenv(event_log.PARSE_WORKERS_ENV, "2")
+    assert event_log.parallel_workers(events_file) == 2
+    assert read_events(events_file) == events
+
+
+def test_parallel_parsing_skips_a_partially_written_line(tmp_path):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance(
+            f"account{i % 3}",
+            Asset.for_symbol("XYZ"),
+            date(2022, 1, 1),
+            Decimal(i),
+            now,
+        )
+        for i in range(50)
+    ]
+    with open_event_writer(events_file) as writer:
+        for evt in events:
+            writer.write(evt)
+    with open(events_file, "a") as file:
+        file.write('{"type": "SetBalance", "date": "2022-01-')
+
+    assert read_events_parallel(events_file, workers=2) == events
+    latest = map_ranges(
+        partial(latest_matching_events, date=date(2022, 1, 1), account=None),
+        events_file,
+        workers=2,
+    )
+    latest_balances = latest_events(itertools.chain.from_iterable(latest))
+    assert sorted(latest_balances, key=lambda evt: evt.account) == sorted(
+        events[-3:], key=lambda evt: evt.account
+    )
+
+
+def test_prefilter_only_skips_events_the_report_ignores(tmp_path):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance(
+            f"account{i % 3}",
+            Asset.for_symbol(f"SYM{i % 7}"),
+            date(2022, 1 + i % 12, 1),
+            Decimal(i),
+            now,
+        )
+        for i in range(100)
+    ]
+    with open_event_writer(events_file) as writer:
+        for evt in events:
+            writer.write(evt)
+
+    for target_date, account in (
+        (date(2022, 6, 1), None),
+        (date(2022, 3, 1), "account1"),
+    ):
+        prefilter = EventPrefilter.for_report(target_date, account)
+        expected = list(filter(event_matcher(target_date, account), events))
+        assert list(iter_events(events_file, prefilter=prefilter)) == expected
+        assert read_events_parallel(events_file, 2, prefilter) == expected
+
+
+def test_event_writers_must_implement_writing(tmp_path):
+    class OpenOnlyWriter(event_log.BatchedEventWriter):
+        def open(self):
+            pass
+
+    with pytest.raises(TypeError):
+        OpenOnlyWriter(str(tmp_path / "harvest.test.jsonl"))
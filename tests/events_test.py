@@ -0,0 +1,83 @@
+from dataclasses import FrozenInstanceError
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+import pickle
+import pytest
+from harvest.events import (
+    Allocation,
+    Asset,
+    Money,
+    RunReportSeries,
+    SetAllocation,
+    SetBalance,
+    parse_event,
+    parse_event_json,
+    to_event_json,
+)
+
+
+def test_parsed_values_are_interned():
+    allocation = Allocation(
+        stock_large=Decimal("60"),
+        stock_mid_small=Decimal("10"),
+        stock_intl=Decimal("10"),
+        bond_us=Decimal("15"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("5"),
+    )
+    now = datetime.now(timezone.utc)
+    asset = Asset(identifier="XYZ", type="investment")
+    balance_json = to_event_json(
+        SetBalance("account1", asset, date(2022, 1, 1), Decimal("1.5"), now)
+    )
+    allocation_json = to_event_json(
+        SetAllocation(asset, date(2022, 1, 1), allocation, now)
+    )
+
+    assert json.loads(balance_json)["asset"] == {
+        "identifier": "XYZ",
+        "type": "investment",
+    }
+
+    first, second = parse_event_json(balance_json), parse_event_json(balance_json)
+    assert first == second
+    assert first.asset is second.asset
+    assert first.asset is Asset.for_symbol("XYZ")
+    assert first.account is second.account
+    assert pickle.loads(pickle.dumps(first)).asset is first.asset
+
+    first, second = parse_event_json(allocation_json), parse_event_json(allocation_json)
+    assert first.allocation is second.allocation
+    assert first.allocation == allocation
+    assert first.allocation.other == Decimal("0")
+    with pytest.raises(FrozenInstanceError):
+        first.allocation.cash = Decimal("10")
+
+
+def test_money_arithmetic_and_formatting():
+    total = Money(Decimal("1234567.891"))
+
+    assert repr(total) == "1,234,567.89"
+    assert repr(Money(Decimal("-0.125"))) == "-0.12"
+    assert repr(Money(Decimal("999.995"))) == "1,000.00"
+    assert total * (Decimal("70.5") / 100) == Decimal("870370.363155")
+    assert total + Money(Decimal("0.109")) == Decimal("1234568")
+    assert total - 1 == Money(Decimal("1234566.891"))
+    assert total * 0.1 == Decimal("123456.7891")
+    assert Money(Decimal("50")) / Money(Decimal("200")) == Decimal("0.25")
+    assert Money(Decimal("50")) / Decimal("4") == Decimal("12.5")
+    assert not hasattr(total, "__dict__")
+
+
+def test_report_series_rejects_unknown_frequencies_and_layouts():
+    assert parse_event(
+        "run_report_series", date(2022, 1, 1), "2022-12-31", "weekly", "", "files"
+    ) == RunReportSeries(date(2022, 1, 1), date(2022, 12, 31), "weekly", None, "files")
+
+    with pytest.raises(ValueError, match="frequency: fortnightly"):
+        parse_event("run_report_series", date(2022, 1, 1), "2022-12-31", "fortnightly")
+    with pytest.raises(ValueError, match="layout: wide"):
+        parse_event(
+            "run_report_series", date(2022, 1, 1), "2022-12-31", "monthly", "", "wide"
+        )
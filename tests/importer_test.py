@@ -0,0 +1,36 @@
+from datetime import date
+from decimal import Decimal
+from harvest.actions import read_events
+from harvest.events import Asset, SetBalance, SetPrice
+from harvest.importer import import_csv
+
+
+def test_import_csv_skips_records_already_in_the_log(tmp_path):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    positions = tmp_path / "positions.csv"
+    prices = tmp_path / "prices.csv"
+    positions.write_text(
+        "Date,Account,Symbol,Amount\n"
+        "2022-05-01,account1,XYZ,1.5\n"
+        "2022-05-01,account1,FDRXX,100\n"
+    )
+    prices.write_text("date,symbol,price\n2022-05-01,XYZ,10.25\n2022-05-01,XYZ,10.25\n")
+
+    result = import_csv([str(positions), str(prices)], events_file)
+    assert (result.imported, result.skipped) == (3, 1)
+
+    positions.write_text(
+        "Date,Account,Symbol,Amount\n"
+        "2022-05-01,account1,XYZ,1.50\n"
+        "2022-05-02,account1,XYZ,2\n"
+    )
+    result = import_csv([str(positions)], events_file)
+    assert (result.imported, result.skipped) == (1, 1)
+
+    events = read_events(events_file)
+    assert [(type(evt), evt.asset, evt.date, evt.amount) for evt in events] == [
+        (SetBalance, Asset.for_symbol("XYZ"), date(2022, 5, 1), Decimal("1.5")),
+        (SetBalance, Asset.cash("FDRXX"), date(2022, 5, 1), Decimal("100")),
+        (SetPrice, Asset.for_symbol("XYZ"), date(2022, 5, 1), Decimal("10.25")),
+        (SetBalance, Asset.for_symbol("XYZ"), date(2022, 5, 2), Decimal("2")),
+    ]
@@ -0,0 +1,73 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import io
+import json
+import pytest
+from harvest import instrumentation
+from harvest.actions import handle_event, write_event
+from harvest.events import (
+    Allocation,
+    Asset,
+    RunReport,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+)
+from harvest.report import write_rows
+
+
+@pytest.fixture
+def enabled():
+    yield instrumentation.enable()
+    instrumentation.disable()
+
+
+def test_run_report_records_phases_and_counters(tmp_path, enabled):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    for evt in [
+        SetAllocation(xyz, date(2022, 1, 1), allocation, now),
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("2"), now),
+        SetBalance("account2", xyz, date(2022, 5, 1), Decimal("3"), now),
+        SetPrice(xyz, date(2022, 5, 2), Decimal("10"), now),
+    ]:
+        write_event(evt, file_name=events_file)
+
+    output = str(tmp_path / "harvest.csv")
+    handle_event(RunReport(date(2022, 5, 2), "account1", output), events_file)
+
+    summary = instrumentation.emit(str(tmp_path / "summary.json"))
+    assert set(summary["phases"]) == {
+        "read_events",
+        "fetch_prices",
+        "create_report",
+        "compute",
+        "write_to_file",
+    }
+    assert all(phase["calls"] == 1 for phase in summary["phases"].values())
+    # account2's balance is skipped by the prefilter before it is parsed
+    assert summary["counters"]["events_parsed"] == 3
+    assert summary["counters"]["events_matched"] == 3
+    assert (
+        summary["counters"]["bytes_written"]
+        == (tmp_path / "harvest.csv").stat().st_size
+    )
+    assert summary["http"]["calls"] == 0
+    assert json.loads((tmp_path / "summary.json").read_text()) == summary
+
+
+def test_bytes_written_to_a_stream_are_counted(enabled):
+    output = io.StringIO()
+
+    write_rows([["Account", "Symbol"], ["account1", "XYZ"]], output)
+
+    assert enabled.counters["bytes_written"] == len(output.getvalue())
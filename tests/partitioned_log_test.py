@@ -0,0 +1,94 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import os
+import pytest
+from harvest import partitioned_log
+from harvest.actions import handle_event, read_events, write_event
+from harvest.events import (
+    Allocation,
+    Asset,
+    RunReport,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+    event_matcher,
+)
+from harvest.partitioned_log import partition_log, read_manifest
+
+
+def generate_events():
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    return [
+        SetAllocation(xyz, date(2020, 1, 1), allocation, now),
+        SetBalance("account1", xyz, date(2021, 5, 1), Decimal("2"), now),
+        SetBalance("account2", xyz, date(2021, 5, 1), Decimal("3"), now),
+        SetPrice(xyz, date(2021, 5, 1), Decimal("10"), now),
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("4"), now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("11"), now),
+    ]
+
+
+@pytest.mark.parametrize("by_account", [False, True])
+def test_reads_only_segments_a_report_can_match(tmp_path, by_account):
+    directory = str(tmp_path / "harvest.test.partitioned")
+    events = generate_events()
+    assert partition_log(events, directory, by_account=by_account) == len(events)
+    assert sorted(read_events(directory), key=events.index) == events
+
+    for dte, account in ((date(2021, 6, 1), "account1"), (date(2022, 6, 1), None)):
+        matcher = event_matcher(dte, account)
+        read = list(partitioned_log.read_events(directory, dte, account))
+        assert sorted(filter(matcher, read), key=events.index) == [
+            evt for evt in events if matcher(evt)
+        ]
+        assert all(evt.date.year <= dte.year for evt in read)
+
+    if by_account:
+        read = partitioned_log.read_events(directory, date(2021, 6, 1), "account1")
+        assert "account2" not in {getattr(evt, "account", None) for evt in read}
+
+
+def test_writes_roll_over_to_new_segments(tmp_path):
+    directory = str(tmp_path / "harvest.test.partitioned")
+    events = generate_events()
+    for evt in events[:4]:
+        write_event(evt, file_name=directory)
+    assert set(read_manifest(directory).segments) == {"2020", "2021"}
+
+    for evt in events[4:]:
+        write_event(evt, file_name=directory)
+    manifest = read_manifest(directory)
+    assert set(manifest.segments) == {"2020", "2021", "2022"}
+    assert (manifest.segments["2021"].min_date, manifest.segments["2021"].count) == (
+        "2021-05-01",
+        3,
+    )
+
+    output = str(tmp_path / "harvest.csv")
+    handle_event(RunReport(date(2022, 5, 1), "account1", output), directory)
+    assert os.path.exists(output)
+
+
+def test_accounts_with_similar_names_get_their_own_segments(tmp_path):
+    directory = str(tmp_path / "harvest.test.partitioned")
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("a/b", xyz, date(2022, 5, 1), Decimal("2"), now),
+        SetBalance("a_b", xyz, date(2022, 5, 1), Decimal("3"), now),
+    ]
+    partition_log(events, directory, by_account=True)
+
+    assert len(read_manifest(directory).segments) == 2
+    for evt in events:
+        read = partitioned_log.read_events(directory, date(2022, 6, 1), evt.account)
+        assert list(read) == [evt]
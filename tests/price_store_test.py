@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from harvest.events import Asset
+from harvest.price_store import (
+    PRICE_STORE_ENV,
+    PriceStore,
+    missing_ranges,
+    open_default_price_store,
+)
+from harvest.quotes import Quote, fill_price_store, lookup_prices_for_dates, to_quotes
+
+
+def daily_fetcher(requests):
+    def fetcher(symbol, start, end):
+        requests.append((symbol, start, end))
+        days = (end - start).days + 1
+        dates = (start + timedelta(days=i) for i in range(days))
+        return "Date,Adj Close\n" + "".join(
+            f"{dte},{dte.day}\n" for dte in dates if dte.weekday() < 5
+        )
+
+    return {"investment": fetcher}
+
+
+def test_missing_ranges():
+    covered = [
+        (date(2022, 1, 5), date(2022, 1, 10)),
+        (date(2022, 1, 20), date(2022, 1, 25)),
+    ]
+    assert missing_ranges(covered, date(2022, 1, 1), date(2022, 1, 31)) == [
+        (date(2022, 1, 1), date(2022, 1, 4)),
+        (date(2022, 1, 11), date(2022, 1, 19)),
+        (date(2022, 1, 26), date(2022, 1, 31)),
+    ]
+    assert missing_ranges(covered, date(2022, 1, 6), date(2022, 1, 9)) == []
+
+
+def test_lookups_only_fetch_ranges_not_yet_stored(tmp_path):
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    requests = []
+    fetchers = daily_fetcher(requests)
+    xyz = Asset.for_symbol("XYZ")
+
+    # 2022-05-15 is a Sunday, the latest quote is from the Friday before
+    dates = [date(2022, 5, 10), date(2022, 5, 15)]
+    quotes = lookup_prices_for_dates([xyz], dates, fetchers, store=store)
+    assert quotes[date(2022, 5, 15)][xyz] == Quote(date(2022, 5, 13), Decimal("13"))
+    assert requests == [("XYZ", date(2022, 5, 3), date(2022, 5, 15))]
+
+    assert lookup_prices_for_dates([xyz], dates, fetchers, store=store) == quotes
+    lookup_prices_for_dates([xyz], [date(2022, 5, 20)], fetchers, store=store)
+    assert requests[1:] == [("XYZ", date(2022, 5, 16), date(2022, 5, 20))]
+
+    # a backfill is a single request per asset for whatever is still missing
+    assert (
+        fill_price_store([xyz], date(2021, 1, 1), date(2022, 6, 30), store, fetchers)
+        == 2
+    )
+    assert requests[2:] == [
+        ("XYZ", date(2021, 1, 1), date(2022, 5, 2)),
+        ("XYZ", date(2022, 5, 21), date(2022, 6, 30)),
+    ]
+    assert store.coverage(xyz) == [(date(2021, 1, 1), date(2022, 6, 30))]
+    assert len(store.quotes(xyz)) == 390
+
+
+def test_empty_responses_store_no_quotes(tmp_path):
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    xyz = Asset.for_symbol("XYZ")
+    fetchers = {"investment": lambda symbol, start, end: ""}
+
+    assert list(to_quotes("")) == []
+    assert fill_price_store([xyz], date(2022, 5, 1), date(2022, 5, 6), store, fetchers)
+    assert store.quotes(xyz) == []
+
+
+def test_price_store_is_kept_next_to_the_events_file(tmp_path, monkeypatch):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    monkeypatch.delenv(PRICE_STORE_ENV, raising=False)
+    with open_default_price_store(events_file) as store:
+        assert store.file_name == f"{events_file}.prices.sqlite3"
+
+    monkeypatch.setenv(PRICE_STORE_ENV, "")
+    with open_default_price_store(events_file) as store:
+        assert store is None
@@ -0,0 +1,135 @@
+from datetime import date
+from decimal import Decimal
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import pytest
+from harvest.events import Asset
+from harvest.price_store import PriceStore
+from harvest.quotes import (
+    Quote,
+    fetch_quotes,
+    http_session,
+    lookup_prices,
+    lookup_prices_for_dates,
+    yahoo_finance_fetcher,
+)
+
+PRICE_DATA = "Date,Open,High,Low,Close,Adj Close,Volume\n2022-05-25,1,1,1,1,34.56,100\n2022-05-26,1,1,1,1,35.67,100\n"
+
+
+@pytest.fixture
+def quote_server():
+    requested_paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested_paths.append(self.path)
+            symbol = self.path.split("?")[0].split("/")[-1]
+            body = PRICE_DATA.encode() if symbol != "MISSING" else b""
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requested_paths
+    server.shutdown()
+    server.server_close()
+
+
+def test_lookup_prices_fetches_concurrently(quote_server):
+    base_url, requested_paths = quote_server
+    assets = [Asset.for_symbol(f"SYM{i}") for i in range(20)] + [
+        Asset.for_symbol("MISSING")
+    ]
+    fetcher = partial(yahoo_finance_fetcher, base_url=base_url)
+
+    quotes = lookup_prices(
+        assets,
+        date.fromisoformat("2022-05-27"),
+        fetchers={"investment": fetcher},
+        max_workers=4,
+    )
+
+    assert len(requested_paths) == 21
+    assert Asset.for_symbol("MISSING") not in quotes
+    assert quotes[Asset.for_symbol("SYM7")] == Quote(
+        date=date.fromisoformat("2022-05-26"), price=Decimal("35.67")
+    )
+
+
+def test_fetch_quotes_answers_every_date_from_one_request():
+    requests = []
+
+    def fetcher(symbol, start, end):
+        requests.append((symbol, start, end))
+        return "Date,Adj Close\n2022-03-31,3.0\n2022-01-31,1.0\n2022-02-28,2.0\n"
+
+    dates = [date.fromisoformat(d) for d in ("2022-01-31", "2022-02-28", "2022-03-31")]
+    quotes = fetch_quotes(Asset.for_symbol("XYZ"), dates + [date(2022, 1, 1)], fetcher)
+
+    assert requests == [("XYZ", date(2021, 12, 25), date(2022, 3, 31))]
+    assert date(2022, 1, 1) not in quotes
+    assert [quotes[d].price for d in dates] == [
+        Decimal("1.0"),
+        Decimal("2.0"),
+        Decimal("3.0"),
+    ]
+
+
+def test_lookup_prices_for_dates():
+    dates = [date(2022, 1, 31), date(2022, 2, 28)]
+    quotes = lookup_prices_for_dates([Asset.cash()], dates)
+
+    assert quotes[date(2022, 2, 28)][Asset.cash()] == Quote(
+        date=date(2022, 2, 28), price=Decimal("1.0")
+    )
+    assert quotes[date(2022, 1, 31)][Asset.cash()].date == date(2022, 1, 31)
+
+
+def test_quotes_older_than_the_lookback_window_are_not_used(tmp_path):
+    def fetcher(symbol, start, end):
+        return "Date,Adj Close\n2022-01-03,1.0\n2022-03-01,2.0\n"
+
+    xyz = Asset.for_symbol("XYZ")
+    dates = [date(2022, 1, 5), date(2022, 2, 20), date(2022, 3, 2)]
+    expected = {
+        date(2022, 1, 5): {xyz: Quote(date(2022, 1, 3), Decimal("1.0"))},
+        date(2022, 2, 20): {},
+        date(2022, 3, 2): {xyz: Quote(date(2022, 3, 1), Decimal("2.0"))},
+    }
+
+    fetchers = {"investment": fetcher}
+    assert lookup_prices_for_dates([xyz], dates, fetchers) == expected
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    assert lookup_prices_for_dates([xyz], dates, fetchers, store=store) == expected
+
+
+def test_session_pool_grows_with_the_number_of_workers():
+    session = http_session(32)
+
+    assert session is http_session()
+    assert session.get_adapter("https://example.com")._pool_maxsize >= 32
+
+
+def test_lookup_prices_overlaps_fetches_and_keeps_default_fetchers():
+    # every fetch waits for the others, so this only completes if they overlap
+    barrier = threading.Barrier(4, timeout=5)
+
+    def fetcher(symbol, date):
+        barrier.wait()
+        return f"Date,Adj Close\n{date},2.0\n"
+
+    assets = [Asset.for_symbol(f"SYM{i}") for i in range(4)] + [Asset.cash()]
+    quotes = lookup_prices(
+        assets, date(2022, 5, 27), fetchers={"investment": fetcher}, max_workers=4
+    )
+
+    assert quotes[Asset.for_symbol("SYM3")].price == Decimal("2.0")
+    assert quotes[Asset.cash()].price == Decimal("1.0")
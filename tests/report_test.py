@@ -1,5 +1,6 @@
 from datetime import date, datetime, timezone
 from decimal import Decimal
+import io
 import pytest
 from harvest.events import (
     RunReport,
@@ -8,9 +9,18 @@ from harvest.events import (
     SetPrice,
     Allocation,
     Asset,
+    Money,
+    RunReportSeries,
     SetTargetAllocation,
 )
-from harvest.report import Report
+from harvest.report import (
+    COMPUTE_ENGINE_ENV,
+    LiveReport,
+    Report,
+    compute_engine_from_env,
+    report_series,
+    series_dates,
+)
 
 
 # https://docs.pytest.org/en/7.1.x/explanation/goodpractices.html#test-discovery
@@ -203,3 +213,214 @@ def test_compute_report():
     assert row6[13] == pytest.approx(Decimal("94.82"), rel=tolerance)
     assert row6[14] == pytest.approx(Decimal("728.72"), rel=tolerance)
     assert row6[15] == ""
+
+
+def test_report_incomplete_assets():
+    xyz = Asset.for_symbol("XYZ")
+    abc = Asset.for_symbol("ABC")
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetBalance("account1", abc, date(2022, 5, 1), Decimal("10"), now),
+        SetBalance("account2", abc, date(2022, 5, 1), Decimal("10"), now),
+        SetBalance("account2", abc, date(2022, 5, 2), Decimal("0"), now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("1.5"), now),
+        SetPrice(abc, date(2022, 5, 1), Decimal("2.5"), now),
+        SetAllocation(xyz, date(2022, 5, 1), allocation, now),
+    ]
+
+    report = Report.create(RunReport(date(2022, 5, 27)), events)
+
+    assert [(rec.account, rec.asset) for rec in report.records] == [("account1", xyz)]
+    assert report.incomplete_assets == {abc}
+
+
+def to_cents(rows):
+    def cell(value):
+        if isinstance(value, Money):
+            return round(value.amount, 2)
+        elif isinstance(value, Decimal):
+            return round(value, 2)
+        return value
+
+    return [[cell(value) for value in row] for row in rows]
+
+
+def test_live_report_matches_full_report():
+    xyz = Asset.for_symbol("XYZ")
+    abc = Asset.for_symbol("ABC")
+    allocation = Allocation(
+        stock_large=Decimal("70.5"),
+        stock_mid_small=Decimal("6.5"),
+        stock_intl=Decimal("0.1"),
+        bond_us=Decimal("7.71"),
+        bond_intl=Decimal("1.2"),
+        cash=Decimal("3.45"),
+    )
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetBalance("account2", xyz, date(2022, 5, 1), Decimal("20"), now),
+        SetBalance("account1", abc, date(2022, 5, 1), Decimal("30"), now),
+        SetAllocation(xyz, date(2022, 5, 1), allocation, now),
+        SetAllocation(abc, date(2022, 5, 1), allocation, now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("1.5"), now),
+        SetPrice(abc, date(2022, 5, 1), Decimal("2.5"), now),
+        SetTargetAllocation(date(2022, 1, 1), allocation, now),
+        SetPrice(xyz, date(2022, 5, 2), Decimal("1.75"), now),
+        SetBalance("account2", xyz, date(2022, 5, 3), Decimal("0"), now),
+        SetBalance("account1", abc, date(2022, 5, 30), Decimal("99"), now),
+        SetPrice(abc, date(2022, 4, 1), Decimal("5"), now),
+    ]
+    report_event = RunReport(date(2022, 5, 27))
+    live = LiveReport(report_event)
+
+    for i, evt in enumerate(events):
+        live.apply(evt)
+        expected = Report.create(report_event, events[: i + 1])
+        assert to_cents(live.compute()) == to_cents(expected.compute())
+        assert live.incomplete_assets == expected.incomplete_assets
+
+
+def test_live_report_keeps_assets_other_accounts_hold_incomplete():
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetBalance("account2", xyz, date(2022, 5, 1), Decimal("20"), now),
+        SetBalance("account2", xyz, date(2022, 5, 2), Decimal("0"), now),
+    ]
+    report_event = RunReport(date(2022, 5, 27))
+    live = LiveReport(report_event)
+
+    live.apply_all(events)
+
+    expected = Report.create(report_event, events)
+    assert expected.incomplete_assets == {xyz}
+    assert live.incomplete_assets == expected.incomplete_assets
+
+
+def test_series_dates():
+    assert series_dates(date(2022, 1, 15), date(2022, 4, 30), "monthly") == [
+        date(2022, 1, 31),
+        date(2022, 2, 28),
+        date(2022, 3, 31),
+        date(2022, 4, 30),
+    ]
+    assert series_dates(date(2021, 1, 1), date(2022, 6, 30), "quarterly")[-1] == date(
+        2022, 6, 30
+    )
+    assert series_dates(date(2022, 1, 1), date(2022, 1, 16), "weekly") == [
+        date(2022, 1, 2),
+        date(2022, 1, 9),
+        date(2022, 1, 16),
+    ]
+
+
+def test_report_series_matches_reports_for_each_date():
+    xyz = Asset.for_symbol("XYZ")
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("account1", xyz, date(2022, 3, 10), Decimal("30"), now),
+        SetPrice(xyz, date(2022, 1, 31), Decimal("1.5"), now),
+        SetBalance("account1", xyz, date(2022, 1, 5), Decimal("10"), now),
+        SetAllocation(xyz, date(2022, 1, 1), allocation, now),
+        SetPrice(xyz, date(2022, 2, 28), Decimal("2.5"), now),
+        SetBalance("account1", xyz, date(2022, 1, 5), Decimal("20"), now),
+        SetPrice(xyz, date(2022, 3, 31), Decimal("3.5"), now),
+    ]
+    series = RunReportSeries(date(2022, 1, 1), date(2022, 3, 31), "monthly")
+
+    reports = list(report_series(series, events))
+
+    assert [dte for dte, _, _ in reports] == series_dates(
+        series.start, series.end, series.frequency
+    )
+    for dte, rows, incomplete in reports:
+        expected = Report.create(RunReport(dte), events)
+        assert to_cents(rows) == to_cents(expected.compute())
+        assert incomplete == expected.incomplete_assets
+
+
+def test_numpy_compute_matches_decimal_compute():
+    pytest.importorskip("numpy")
+
+    allocation = Allocation(
+        stock_large=Decimal("70.5"),
+        stock_mid_small=Decimal("6.5"),
+        stock_intl=Decimal("0.1"),
+        bond_us=Decimal("7.71"),
+        bond_intl=Decimal("1.2"),
+        cash=Decimal("3.45"),
+    )
+    now = datetime.now(timezone.utc)
+    events = [SetTargetAllocation(date(2022, 1, 1), allocation, now)]
+    for i in range(50):
+        asset = Asset.for_symbol(f"SYM{i}")
+        events.append(SetAllocation(asset, date(2022, 1, 1), allocation, now))
+        events.append(SetPrice(asset, date(2022, 1, 1), Decimal(f"{i}.37"), now))
+        events.append(
+            SetBalance(f"account{i % 3}", asset, date(2022, 1, 1), Decimal(i * 7), now)
+        )
+
+    report = Report.create(RunReport(date(2022, 5, 27)), events)
+    rows = report.compute(engine="numpy", verify=True)
+
+    assert len(rows) == len(report.compute(engine="decimal"))
+    assert to_cents(rows[-4:]) == to_cents(report.compute()[-4:])
+
+
+def test_write_report_rows_to_stream():
+    xyz = Asset.for_symbol("XYZ")
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("1234.5"), now),
+        SetAllocation(xyz, date(2022, 5, 1), allocation, now),
+    ]
+    report = Report.create(RunReport(date(2022, 5, 27)), events)
+    output = io.StringIO()
+
+    assert report.rows().__next__() == report.compute()[0]
+    report.write_to_file(output)
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 4
+    assert lines[1].startswith("account1,XYZ,10,2022-05-01,1234.5,2022-05-01,")
+    assert lines[2].endswith(',"12,345.00"')
+
+
+def test_compute_engine_from_env(monkeypatch):
+    monkeypatch.delenv(COMPUTE_ENGINE_ENV, raising=False)
+    assert compute_engine_from_env() == "decimal"
+
+    monkeypatch.setenv(COMPUTE_ENGINE_ENV, "numpy")
+    assert compute_engine_from_env() == "numpy"
+
+    monkeypatch.setenv(COMPUTE_ENGINE_ENV, "numpi")
+    with pytest.raises(ValueError, match="numpi"):
+        compute_engine_from_env()
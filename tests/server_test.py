@@ -0,0 +1,91 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import threading
+import urllib.request
+import pytest
+from harvest.actions import read_events, write_event
+from harvest.client import send_event
+from harvest.events import (
+    Allocation,
+    Asset,
+    RunReport,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+)
+from harvest.report import Report
+from harvest.server import ReportServer
+
+
+@pytest.fixture
+def report_server(tmp_path):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    xyz = Asset.for_symbol("XYZ")
+    now = datetime.now(timezone.utc)
+    allocation = Allocation(
+        stock_large=Decimal("100"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("0"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    for evt in [
+        SetAllocation(xyz, date(2022, 1, 1), allocation, now),
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("2"), now),
+        SetBalance("account2", xyz, date(2022, 5, 1), Decimal("3"), now),
+        SetPrice(xyz, date(2022, 5, 1), Decimal("10"), now),
+        SetPrice(xyz, date(2022, 6, 1), Decimal("12"), now),
+    ]:
+        write_event(evt, file_name=events_file)
+
+    server = ReportServer(events_file, ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", events_file
+    server.shutdown()
+    server.server_close()
+
+
+def expected_csv(events_file, report_event, tmp_path):
+    output = str(tmp_path / "expected.csv")
+    Report.create(report_event, read_events(events_file)).write_to_file(output)
+    with open(output, newline="") as file:
+        return file.read()
+
+
+def test_server_answers_reports_from_warm_state(report_server, tmp_path):
+    url, events_file = report_server
+
+    with urllib.request.urlopen(
+        f"{url}/report?date=2022-05-01&account=account1"
+    ) as resp:
+        csv = resp.read().decode()
+    assert csv == expected_csv(
+        events_file, RunReport(date(2022, 5, 1), "account1"), tmp_path
+    )
+
+    # events sent by a client, or appended to the log by anyone else, are picked up
+    send_event(
+        url,
+        "set_balance",
+        date(2022, 6, 1),
+        ["account1", "XYZ", "4", "2022-06-01T00:00:00"],
+    )
+    write_event(
+        SetBalance(
+            "account2",
+            Asset.for_symbol("XYZ"),
+            date(2022, 6, 1),
+            Decimal("5"),
+            datetime.now(timezone.utc),
+        ),
+        file_name=events_file,
+    )
+    output = str(tmp_path / "harvest.csv")
+    send_event(url, "run_report", date(2022, 6, 1), ["", output])
+    with open(output, newline="") as file:
+        assert file.read() == expected_csv(
+            events_file, RunReport(date(2022, 6, 1)), tmp_path
+        )
+    assert len(read_events(events_file)) == 7
@@ -0,0 +1,83 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from harvest.actions import read_events, write_event
+from harvest.events import (
+    EVENT_PARSERS,
+    Asset,
+    EventPrefilter,
+    RunReport,
+    SetBalance,
+    SetPrice,
+    parse_set_balance,
+)
+from harvest.report import Report
+from harvest.snapshots import iter_events_as_of, list_snapshots
+
+
+def write_balances(events_file, start, count):
+    xyz = Asset.for_symbol("XYZ")
+    for i in range(count):
+        dte = start + timedelta(days=i)
+        write_event(
+            SetBalance("account1", xyz, dte, Decimal(i), datetime.now(timezone.utc)),
+            file_name=events_file,
+        )
+        write_event(
+            SetPrice(xyz, dte, Decimal(i + 1), datetime.now(timezone.utc)),
+            file_name=events_file,
+        )
+
+
+def test_iter_events_as_of_replays_events_after_snapshot(tmp_path):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    write_balances(events_file, date(2022, 1, 1), 10)
+
+    assert (
+        len(list(iter_events_as_of(events_file, date(2022, 1, 10), interval=5))) == 20
+    )
+    snapshots = list_snapshots(events_file)
+    assert len(snapshots) == 1
+    assert snapshots[0].date == date(2022, 1, 10)
+
+    write_balances(events_file, date(2022, 1, 11), 2)
+    events = list(iter_events_as_of(events_file, date(2022, 1, 12), interval=5))
+    assert len(events) == 6
+
+    # a report before the snapshot date can't use the snapshot
+    assert len(list(iter_events_as_of(events_file, date(2022, 1, 5), interval=5))) == 24
+
+    report_date = date(2022, 1, 12)
+    full = Report.create(RunReport(report_date), read_events(events_file))
+    from_snapshot = Report.create(RunReport(report_date), events)
+    assert [r.amount for r in full.records] == [r.amount for r in from_snapshot.records]
+    assert [r.price for r in full.records] == [r.price for r in from_snapshot.records]
+
+
+def test_iter_events_as_of_prefilters_events_after_the_report_date(
+    tmp_path, monkeypatch
+):
+    events_file = str(tmp_path / "harvest.test.jsonl")
+    write_balances(events_file, date(2022, 1, 1), 10)
+    built = []
+
+    def parse_balance(evt):
+        built.append(evt["date"])
+        return parse_set_balance(evt)
+
+    monkeypatch.setitem(EVENT_PARSERS, "SetBalance", parse_balance)
+    report_date = date(2022, 1, 5)
+    prefilter = EventPrefilter.for_report(report_date)
+
+    events = list(
+        iter_events_as_of(events_file, report_date, interval=5, prefilter=prefilter)
+    )
+
+    assert len(events) == 10
+    assert built == [str(date(2022, 1, 1) + timedelta(days=i)) for i in range(5)]
+    # the skipped events would be missing from a snapshot
+    assert list_snapshots(events_file) == []
+
+    report_date = date(2022, 1, 10)
+    prefilter = EventPrefilter.for_report(report_date)
+    list(iter_events_as_of(events_file, report_date, interval=5, prefilter=prefilter))
+    assert len(list_snapshots(events_file)) == 1
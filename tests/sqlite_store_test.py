@@ -0,0 +1,47 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from harvest.actions import read_events, write_event
+from harvest.events import (
+    Allocation,
+    Asset,
+    SetAllocation,
+    SetBalance,
+    SetPrice,
+    SetTargetAllocation,
+    event_matcher,
+)
+from harvest import sqlite_store
+
+
+def test_import_jsonl_and_read_matching_events(tmp_path):
+    jsonl_file = str(tmp_path / "harvest.test.jsonl")
+    sqlite_file = str(tmp_path / "harvest.test.sqlite3")
+    xyz = Asset.for_symbol("XYZ")
+    allocation = Allocation(
+        stock_large=Decimal("50"),
+        stock_mid_small=Decimal("0"),
+        stock_intl=Decimal("0"),
+        bond_us=Decimal("50"),
+        bond_intl=Decimal("0"),
+        cash=Decimal("0"),
+    )
+    now = datetime.now(timezone.utc)
+    events = [
+        SetBalance("account1", xyz, date(2022, 5, 1), Decimal("1.5"), now),
+        SetBalance("account2", xyz, date(2022, 5, 1), Decimal("2.5"), now),
+        SetBalance("account1", xyz, date(2022, 6, 1), Decimal("3.5"), now),
+        SetPrice(xyz, date(2022, 5, 2), Decimal("10.25"), now),
+        SetPrice(xyz, date(2022, 6, 2), Decimal("11.25"), now),
+        SetAllocation(xyz, date(2022, 1, 1), allocation, now),
+        SetTargetAllocation(date(2022, 1, 1), allocation, now),
+    ]
+    for evt in events:
+        write_event(evt, file_name=jsonl_file)
+
+    assert sqlite_store.import_jsonl(jsonl_file, sqlite_file) == len(events)
+    assert read_events(sqlite_file) == read_events(jsonl_file)
+
+    matched = sqlite_store.read_events(sqlite_file, date(2022, 5, 31), "account1")
+    matcher = event_matcher(date(2022, 5, 31), "account1")
+    assert matched == [evt for evt in read_events(jsonl_file) if matcher(evt)]
+    assert len(matched) == 4